@@ -0,0 +1,73 @@
+"""
+Throughput benchmark for compressed JSON Lines files.
+
+Usage:
+    python benchmarks/bench_codecs.py [--n 200000] [--zstd-threads -1]
+
+Writes the same records with `dump_jsonl` as plain `.jsonl` and as `.jsonl.gz`,
+`.jsonl.zst` and `.jsonl.lz4`, then streams them back with `iter_jsonl`. Rates
+are in uncompressed MB per second; codecs whose module is not installed are
+skipped. `--zstd-threads` overrides AV_ZSTD_THREADS (0 compresses in-line).
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import speedy_utils.common.utils_io as utils_io
+from speedy_utils import dump_jsonl, iter_jsonl
+from speedy_utils.common.utils_print import print_table
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def consume(path):
+    for _ in iter_jsonl(path):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=200_000)
+    parser.add_argument("--zstd-threads", type=int, default=utils_io.ZSTD_THREADS)
+    args = parser.parse_args()
+    utils_io.ZSTD_THREADS = args.zstd_threads
+
+    records = [
+        {"id": i, "text": f"sample text number {i} with ünïcode", "scores": [i, i / 3]}
+        for i in range(args.n)
+    ]
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        plain = os.path.join(tmp, "data.jsonl")
+        dump_jsonl(records, plain)
+        size_mb = os.path.getsize(plain) / 2**20
+        for ext in ("", ".gz", ".zst", ".lz4"):
+            if ext:
+                try:
+                    utils_io._import_codec(ext)
+                except ImportError as exc:
+                    print(f"skipping {ext}: {exc}")
+                    continue
+            path = plain + ext
+            write = timed(dump_jsonl, records, path)
+            read = timed(consume, path)
+            rows.append(
+                {
+                    "codec": ext or "none",
+                    "ratio": f"{size_mb * 2**20 / os.path.getsize(path):.1f}x",
+                    "write MB/s": f"{size_mb / write:.1f}",
+                    "read MB/s": f"{size_mb / read:.1f}",
+                }
+            )
+    print(f"{args.n} records, {size_mb:.1f} MB uncompressed")
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
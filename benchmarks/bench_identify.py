@@ -0,0 +1,68 @@
+"""
+Benchmark `identify` against the previous pickle-then-hash implementation.
+
+Usage:
+    python benchmarks/bench_identify.py
+
+For each input, reports wall time per call and the peak extra memory allocated
+while hashing (measured with tracemalloc).
+"""
+
+import pickle
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import xxhash
+
+from speedy_utils import identify
+from speedy_utils.common.utils_print import print_table
+
+
+def legacy_identify(x):
+    return xxhash.xxh64(pickle.dumps(x), seed=0).hexdigest()
+
+
+def measure(fn, x, repeat: int):
+    fn(x)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(x)
+    elapsed = (time.perf_counter() - start) / repeat
+    tracemalloc.start()
+    fn(x)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    rng = np.random.default_rng(0)
+    cases = {
+        "small args tuple": (("fingerprint", (1, "a"), {"b": 2.0}), 20000),
+        "ndarray 128MB": (rng.random(16 * 2**20), 5),
+        "DataFrame 1M x 8": (pd.DataFrame(rng.random((2**20, 8))), 5),
+        "bytes 64MB": (rng.bytes(64 * 2**20), 5),
+        "str 16MB": ("x" * 16 * 2**20, 5),
+        "dict of 10k items": ({f"k{i}": i for i in range(10000)}, 200),
+    }
+    rows = []
+    for name, (x, repeat) in cases.items():
+        old_t, old_mem = measure(legacy_identify, x, repeat)
+        new_t, new_mem = measure(identify, x, repeat)
+        rows.append(
+            {
+                "input": name,
+                "pickle+xxh64": f"{old_t * 1e6:.1f} us",
+                "identify": f"{new_t * 1e6:.1f} us",
+                "speedup": f"{old_t / new_t:.2f}x",
+                "peak MB (old)": f"{old_mem / 2**20:.1f}",
+                "peak MB (new)": f"{new_mem / 2**20:.1f}",
+            }
+        )
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Throughput benchmark for JSON Lines reading and writing.
+
+Usage:
+    python benchmarks/bench_jsonl.py [--n 200000]
+
+Compares the previous implementations (one `json.dumps` + `write` per record,
+and reading the file line by line with `json.loads`, since `load_json_or_pickle`
+could not parse JSONL before) with `dump_jsonl`, `JsonlWriter` and `iter_jsonl`,
+using orjson when it is installed and the stdlib fallback otherwise.
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import speedy_utils.common.utils_io as utils_io
+from speedy_utils import JsonlWriter, dump_jsonl, iter_jsonl
+from speedy_utils.common.utils_print import print_table
+
+
+def legacy_dump(records, path):
+    with open(path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def legacy_load(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def writer_dump(records, path):
+    with JsonlWriter(path, mode="w") as writer:
+        writer.write_many(records)
+
+
+def consume(path):
+    for _ in iter_jsonl(path):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=200_000)
+    args = parser.parse_args()
+
+    records = [
+        {"id": i, "text": f"sample text number {i} with ünïcode", "scores": [i, i / 3]}
+        for i in range(args.n)
+    ]
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "data.jsonl")
+        legacy_dump(records, path)
+        size_mb = os.path.getsize(path) / 2**20
+
+        def row(name, seconds):
+            rows.append(
+                {
+                    "case": name,
+                    "seconds": f"{seconds:.3f}",
+                    "MB/s": f"{size_mb / seconds:.1f}",
+                    "records/s": f"{args.n / seconds:,.0f}",
+                }
+            )
+
+        row("write: json.dumps per line (legacy)", timed(legacy_dump, records, path))
+        row("read: json.loads per line (legacy)", timed(legacy_load, path))
+
+        backends = [("stdlib", None)]
+        if utils_io.orjson is not None:
+            backends.append(("orjson", utils_io.orjson))
+        for name, backend in backends:
+            utils_io.orjson = backend
+            row(f"write: dump_jsonl [{name}]", timed(dump_jsonl, records, path))
+            row(f"write: JsonlWriter [{name}]", timed(writer_dump, records, path))
+            row(f"read: iter_jsonl [{name}]", timed(consume, path))
+    print(f"{args.n} records, {size_mb:.1f} MB")
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Micro-benchmark for the memoize hit path.
+
+Usage:
+    python benchmarks/bench_memoize.py [--n 20000]
+
+Reports the per-call overhead of a warm cache hit for each decorator, next to the
+legacy key computation that re-read the function source on every call.
+"""
+
+import argparse
+import inspect
+import tempfile
+import time
+
+from speedy_utils import identify, imemoize, imemoize_v2, memoize, memoize_v2
+from speedy_utils.common.utils_print import print_table
+
+
+def add(a, b=1):
+    return a + b
+
+
+def legacy_key(a, b=1):
+    # What memoize used to do on every call before hashing the arguments.
+    inspect.getfullargspec(add).args
+    func_source = inspect.getsource(add).replace(" ", "")
+    return identify((func_source, (a,), {"b": b}))
+
+
+def per_call_us(fn, n: int) -> float:
+    fn(1, b=2)  # warm the cache
+    start = time.perf_counter()
+    for _ in range(n):
+        fn(1, b=2)
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        rows = {
+            "plain call": per_call_us(add, args.n),
+            "legacy key (getsource per call)": per_call_us(legacy_key, args.n),
+            "imemoize": per_call_us(imemoize(add), args.n),
+            "imemoize_v2": per_call_us(imemoize_v2(["a", "b"])(add), args.n),
+            "memoize (disk hit)": per_call_us(memoize(add, cache_dir=cache_dir), args.n),
+            "memoize_v2 (disk hit)": per_call_us(
+                memoize_v2(["a", "b"], cache_dir=cache_dir)(add), args.n
+            ),
+        }
+    print_table({name: f"{us:.2f} us/call" for name, us in rows.items()})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Benchmark for chunked dispatch in multi_process.
+
+Usage:
+    python benchmarks/bench_multi_process.py [--workers 8] [--budget 2.0]
+
+Runs `multi_process` with the old behaviour (chunksize=1) and with the automatic
+chunk size over tasks of increasing cost. Each row keeps the total amount of work
+near `--budget` CPU seconds, so the columns show where per-item IPC stops
+dominating: cheap tasks gain the most from chunking, and the two modes converge
+once a task costs several milliseconds.
+"""
+
+import argparse
+import time
+
+from speedy_utils import multi_process
+from speedy_utils.common.utils_print import print_table
+
+
+def spin(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+    return seconds
+
+
+def run(inputs, workers, chunksize):
+    start = time.perf_counter()
+    multi_process(spin, inputs, workers=workers, verbose=False, chunksize=chunksize)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--budget", type=float, default=2.0)
+    parser.add_argument("--max-items", type=int, default=200_000)
+    args = parser.parse_args()
+
+    rows = []
+    for item_time in (0, 1e-5, 1e-4, 1e-3, 1e-2):
+        n = min(args.max_items, int(args.budget * args.workers / max(item_time, 1e-5)))
+        inputs = [item_time] * n
+        single = run(inputs, args.workers, chunksize=1)
+        auto = run(inputs, args.workers, chunksize=None)
+        rows.append(
+            {
+                "item time": f"{item_time * 1e6:.0f} us",
+                "items": n,
+                "chunksize=1 (s)": f"{single:.2f}",
+                "auto (s)": f"{auto:.2f}",
+                "speedup": f"{single / auto:.1f}x",
+            }
+        )
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
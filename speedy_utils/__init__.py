@@ -1,4 +1,19 @@
 from .common.clock import Clock, timef, speedy_timer
+from .common.rate_limit import RateLimiter, TokenBucket
+from .common.lazy_dataset import LazyDataset
+from .common.shared_array import SharedArray, SharedFrame, share
+from .common.cache_stats import (
+    cache_stats,
+    cache_stats_prometheus,
+    print_cache_stats,
+)
+from .common.cache_store import (
+    CacheStore,
+    FileStore,
+    SqliteStore,
+    migrate_cache_dir,
+)
+from .common.lru_cache import LRUCache
 from .common.utils_cache import (
     ICACHE,
     SPEED_CACHE_DIR,
@@ -11,10 +26,14 @@ from .common.utils_cache import (
     memoize_v2,
 )
 from .common.utils_io import (
+    JsonlWriter,
     dump_json_or_pickle,
     dump_jsonl,
+    iter_jsonl,
+    iter_sharded,
     load_by_ext,
     load_json_or_pickle,
+    load_sharded,
 )
 from .common.utils_misc import (
     convert_to_builtin_python,
@@ -24,7 +43,21 @@ from .common.utils_misc import (
     mkdir_or_exist,
 )
 from .common.utils_print import fprint, print_table
-from .multi_worker import async_multi_thread, multi_process, multi_thread
+from .multi_worker import (
+    ExecutorStats,
+    ItemError,
+    WorkerPool,
+    async_multi_thread,
+    async_multi_thread_imap,
+    cached_map,
+    close_pools,
+    get_pool,
+    multi_hybrid,
+    multi_process,
+    multi_process_imap,
+    multi_thread,
+    multi_thread_imap,
+)
 
 __all__ = [
     "SPEED_CACHE_DIR",
@@ -35,6 +68,11 @@ __all__ = [
     "timef",  # Ensure timef is moved to an appropriate module or included here
     "load_json_or_pickle",
     "load_by_ext",
+    "iter_jsonl",
+    "JsonlWriter",
+    "load_sharded",
+    "iter_sharded",
+    "LazyDataset",
     "identify",
     "identify_uuid",
     "memoize",
@@ -50,8 +88,31 @@ __all__ = [
     "Clock",
     "multi_thread",
     "multi_process",
+    "multi_thread_imap",
+    "multi_process_imap",
+    "multi_hybrid",
+    "ExecutorStats",
+    "ItemError",
+    "WorkerPool",
+    "get_pool",
+    "close_pools",
+    "share",
+    "RateLimiter",
+    "TokenBucket",
+    "SharedArray",
+    "SharedFrame",
     "async_multi_thread",
+    "async_multi_thread_imap",
+    "cached_map",
     "memoize_method",
     "speedy_timer",
+    "LRUCache",
+    "CacheStore",
+    "FileStore",
+    "SqliteStore",
+    "migrate_cache_dir",
+    "cache_stats",
+    "print_cache_stats",
+    "cache_stats_prometheus",
 ]
 __version__ = "0.1.0"
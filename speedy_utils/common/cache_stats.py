@@ -0,0 +1,198 @@
+# utils/cache_stats.py
+
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from .utils_print import print_table
+
+
+class CacheStats:
+    """
+    Counters for one decorated function.
+
+    `load_time` is the time spent reading cached values (disk or memory) and
+    `compute_time` the time spent running the wrapped function on misses.
+    `prefix` is the store key prefix of the function's entries, or a callable
+    returning it when it depends on the lazily computed function fingerprint.
+    """
+
+    FIELDS = (
+        "hits",
+        "memory_hits",
+        "misses",
+        "errors",
+        "load_time",
+        "compute_time",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        kind: str,
+        store: Any = None,
+        prefix: Union[str, Callable[[], str]] = "",
+    ):
+        self.name = name
+        self.kind = kind
+        self.store = store
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.hits = 0
+            self.memory_hits = 0
+            self.misses = 0
+            self.errors = 0
+            self.load_time = 0.0
+            self.compute_time = 0.0
+
+    def record_hit(self, load_time: float, memory: bool = False, count: int = 1) -> None:
+        with self._lock:
+            self.hits += count
+            self.memory_hits += count if memory else 0
+            self.load_time += load_time
+
+    def record_miss(
+        self, compute_time: float, load_time: float = 0.0, count: int = 1
+    ) -> None:
+        with self._lock:
+            self.misses += count
+            self.compute_time += compute_time
+            self.load_time += load_time
+
+    def record_error(self) -> None:
+        with self._lock:
+            self.errors += 1
+
+    def as_dict(self, count_entries: bool = False) -> Dict[str, Any]:
+        """
+        Snapshot of the counters, plus the backing store's byte counters.
+
+        With `count_entries=True` the number of entries on disk for this function
+        is counted too, which walks the cache directory for the file backend.
+        """
+        return _summarize([self], count_entries)
+
+
+def _summarize(group: List[CacheStats], count_entries: bool) -> Dict[str, Any]:
+    """
+    One row for stats sharing a name and kind, e.g. a function decorated twice.
+
+    Counters are summed; byte counters and entries are taken once per distinct
+    store (and key prefix), so decorations sharing a cache are not counted twice.
+    """
+    row: Dict[str, Any] = {"function": group[0].name, "kind": group[0].kind}
+    row.update(dict.fromkeys(CacheStats.FIELDS, 0))
+    stores: Dict[int, Any] = {}
+    prefixes: Dict[Tuple[int, str], Any] = {}
+    for stats in group:
+        with stats._lock:
+            for field in CacheStats.FIELDS:
+                row[field] += getattr(stats, field)
+        if stats.store is not None:
+            stores[id(stats.store)] = stats.store
+            if count_entries:
+                prefix = stats.prefix() if callable(stats.prefix) else stats.prefix
+                prefixes[(id(stats.store), prefix)] = stats.store
+    calls = row["hits"] + row["misses"]
+    row["hit_rate"] = row["hits"] / calls if calls else 0.0
+    if stores:
+        row["bytes_read"] = sum(store.bytes_read for store in stores.values())
+        row["bytes_written"] = sum(store.bytes_written for store in stores.values())
+        if count_entries:
+            row["entries"] = sum(
+                store.count(prefix) for (_, prefix), store in prefixes.items()
+            )
+    return row
+
+
+_REGISTRY: List[CacheStats] = []
+_REGISTRY_LOCK = threading.Lock()
+
+
+def register_stats(
+    func: Callable,
+    kind: str,
+    store: Any = None,
+    prefix: Union[str, Callable[[], str]] = "",
+) -> CacheStats:
+    """
+    New stats for one decoration of `func`; `cache_stats` merges the stats of
+    decorations sharing a qualified name and kind into a single row.
+    """
+    stats = CacheStats(f"{func.__module__}.{func.__qualname__}", kind, store, prefix)
+    with _REGISTRY_LOCK:
+        _REGISTRY.append(stats)
+    return stats
+
+
+def cache_stats(
+    name: Optional[str] = None, count_entries: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    Counters of every decorated function, or only those whose name contains `name`.
+
+    Decorations of the same function with the same kind are merged into one row;
+    each decorated wrapper keeps its own counters in its `cache_stats` attribute.
+    Note that `bytes_read`/`bytes_written` belong to the cache store, which is shared
+    by all functions caching into the same directory with the same backend.
+    """
+    groups: Dict[Tuple[str, str], List[CacheStats]] = {}
+    with _REGISTRY_LOCK:
+        for stats in _REGISTRY:
+            if name is None or name in stats.name:
+                groups.setdefault((stats.name, stats.kind), []).append(stats)
+    return [_summarize(group, count_entries) for group in groups.values()]
+
+
+def print_cache_stats(name: Optional[str] = None, count_entries: bool = False) -> None:
+    """Print `cache_stats` as a table."""
+    rows = cache_stats(name, count_entries)
+    if not rows:
+        print("No cache statistics recorded")
+        return
+    keys = list(dict.fromkeys(key for row in rows for key in row))
+    print_table([{key: row.get(key, "") for key in keys} for row in rows])
+
+
+_PROMETHEUS_METRICS = {
+    "hits": ("counter", "Cache hits, including memory tier hits."),
+    "memory_hits": ("counter", "Cache hits served from the in-memory tier."),
+    "misses": ("counter", "Cache misses that ran the function."),
+    "errors": ("counter", "Calls that failed inside the caching layer."),
+    "load_time": ("counter", "Seconds spent loading cached values."),
+    "compute_time": ("counter", "Seconds spent computing missed values."),
+    "bytes_read": ("counter", "Bytes read from the cache store."),
+    "bytes_written": ("counter", "Bytes written to the cache store."),
+    "entries": ("gauge", "Entries stored on disk."),
+}
+
+
+def cache_stats_prometheus(count_entries: bool = False) -> str:
+    """Render `cache_stats` in the Prometheus text exposition format."""
+    rows = cache_stats(count_entries=count_entries)
+    lines = []
+    for field, (metric_type, help_text) in _PROMETHEUS_METRICS.items():
+        samples = [row for row in rows if field in row]
+        if not samples:
+            continue
+        metric = f"speedy_cache_{field}"
+        if metric_type == "counter":
+            metric += "_seconds_total" if field.endswith("_time") else "_total"
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {metric_type}")
+        for row in samples:
+            function = row["function"].replace("\\", "\\\\").replace('"', '\\"')
+            labels = f'function="{function}",kind="{row["kind"]}"'
+            lines.append(f"{metric}{{{labels}}} {row[field]}")
+    return "\n".join(lines) + "\n"
+
+
+__all__ = [
+    "CacheStats",
+    "cache_stats",
+    "print_cache_stats",
+    "cache_stats_prometheus",
+]
@@ -0,0 +1,440 @@
+# utils/cache_store.py
+
+import os
+import os.path as osp
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from loguru import logger
+
+from .lru_cache import _MISSING
+from .utils_io import dump_json_or_pickle, load_json_or_pickle
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process deduplication only
+    fcntl = None
+
+
+@contextmanager
+def file_lock(path: str) -> Iterator[None]:
+    """
+    Hold an exclusive advisory lock on `path` across processes.
+
+    The lock file is removed on release; callers must re-check the cache after
+    acquiring the lock, since a waiter may wake up on an already unlinked file.
+    """
+    if fcntl is None:
+        yield
+        return
+    os.makedirs(osp.dirname(osp.abspath(path)), exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+class CacheStore:
+    """
+    Key-value storage backend for the disk caches.
+
+    Keys are relative, slash-separated names such as `funcs/<func_name>/<hash>`.
+    `get` returns `default` on a miss so that `None` can be cached. `bytes_read` and
+    `bytes_written` count the serialized bytes moved by this process.
+    """
+
+    bytes_read = 0
+    bytes_written = 0
+
+    def get(self, key: str, default: Any = _MISSING) -> Any:
+        raise NotImplementedError
+
+    def put(self, key: str, value: Any) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Return the cached values for the keys that are present."""
+        found = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not _MISSING:
+                found[key] = value
+        return found
+
+    def put_many(self, items: Iterable[Tuple[str, Any]]) -> None:
+        for key, value in items:
+            self.put(key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not _MISSING
+
+    def count(self, prefix: str = "") -> int:
+        """Number of stored entries whose key starts with `prefix`."""
+        raise NotImplementedError
+
+    def lock_path(self, key: str) -> Optional[str]:
+        """Lock file for `key`; stores without one compute without locking."""
+        return None
+
+    def lock(self, key: str):
+        """Exclusive cross-process lock for computing `key`."""
+        path = self.lock_path(key)
+        return nullcontext() if path is None else file_lock(path)
+
+    def evict(self, max_bytes: int) -> int:
+        """Drop least recently used entries until the store fits in `max_bytes`."""
+        return 0
+
+    def compact(self) -> None:
+        """Reclaim space left behind by deleted entries."""
+
+
+class FileStore(CacheStore):
+    """
+    One file per key under `root`, the historical SPEED_CACHE_DIR layout.
+
+    `ext` selects the file format (see `dump_json_or_pickle`); `mmap_mode` is passed
+    to `load_json_or_pickle` so `.npy`/`.pkl5` values can be memory-mapped.
+    """
+
+    def __init__(self, root: str, ext: str = ".pkl", mmap_mode: Optional[str] = None):
+        self.root = root
+        self.ext = ext
+        self.mmap_mode = mmap_mode
+
+    def path(self, key: str) -> str:
+        return osp.join(self.root, f"{key}{self.ext}")
+
+    def get(self, key: str, default: Any = _MISSING) -> Any:
+        path = self.path(key)
+        try:
+            size = os.stat(path).st_size
+        except FileNotFoundError:
+            return default
+        value = load_json_or_pickle(path, mmap_mode=self.mmap_mode)
+        self.bytes_read += size
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        path = self.path(key)
+        dump_json_or_pickle(value, path)
+        self.bytes_written += osp.getsize(path)
+
+    def count(self, prefix: str = "") -> int:
+        return sum(
+            name.endswith(self.ext) and not name.startswith(".")
+            for _, _, filenames in os.walk(osp.join(self.root, prefix))
+            for name in filenames
+        )
+
+    def lock_path(self, key: str) -> str:
+        return f"{self.path(key)}.lock"
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def evict(self, max_bytes: int) -> int:
+        files = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if name.endswith(self.ext):
+                    st = os.stat(osp.join(dirpath, name))
+                    files.append((st.st_atime, st.st_size, osp.join(dirpath, name)))
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        for _, size, path in sorted(files):
+            if total <= max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            removed += 1
+        return removed
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    atime REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cache_atime ON cache(atime);
+CREATE TABLE IF NOT EXISTS meta (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    total INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta VALUES (0, 0);
+CREATE TRIGGER IF NOT EXISTS cache_ins AFTER INSERT ON cache
+BEGIN UPDATE meta SET total = total + NEW.size; END;
+CREATE TRIGGER IF NOT EXISTS cache_del AFTER DELETE ON cache
+BEGIN UPDATE meta SET total = total - OLD.size; END;
+CREATE TRIGGER IF NOT EXISTS cache_upd AFTER UPDATE OF size ON cache
+BEGIN UPDATE meta SET total = total - OLD.size + NEW.size; END;
+"""
+
+_UPSERT = (
+    "INSERT INTO cache (key, value, size, atime) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT(key) DO UPDATE SET "
+    "value = excluded.value, size = excluded.size, atime = excluded.atime"
+)
+
+
+class SqliteStore(CacheStore):
+    """
+    All entries in a single SQLite database in WAL mode.
+
+    Values are pickled into one table, so millions of cached calls cost one file
+    instead of millions of inodes. Safe to share between threads and processes;
+    each thread (and forked process) opens its own connection. When `max_bytes`
+    is set, least recently used entries are evicted after writes.
+    """
+
+    # Access times are refreshed at most this often, to keep reads from writing.
+    ATIME_RESOLUTION = 60.0
+
+    def __init__(self, db_path: str, max_bytes: Optional[int] = None):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        os.makedirs(osp.dirname(osp.abspath(db_path)), exist_ok=True)
+        with self._conn() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=60, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key: str, default: Any = _MISSING) -> Any:
+        found = self.get_many([key])
+        return found.get(key, default)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        keys = list(keys)
+        conn = self._conn()
+        now = time.time()
+        found, stale = {}, []
+        for start in range(0, len(keys), 500):
+            chunk = keys[start : start + 500]
+            rows = conn.execute(
+                f"SELECT key, value, atime FROM cache WHERE key IN ({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            for key, blob, atime in rows:
+                found[key] = pickle.loads(blob)
+                self.bytes_read += len(blob)
+                if now - atime > self.ATIME_RESOLUTION:
+                    stale.append((now, key))
+        if stale:
+            conn.executemany("UPDATE cache SET atime = ? WHERE key = ?", stale)
+        return found
+
+    def put(self, key: str, value: Any) -> None:
+        self.put_many([(key, value)])
+
+    def lock_path(self, key: str) -> str:
+        return osp.join(osp.dirname(osp.abspath(self.db_path)), "locks", f"{key}.lock")
+
+    def put_many(self, items: Iterable[Tuple[str, Any]]) -> None:
+        now = time.time()
+        rows = []
+        for key, value in items:
+            blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            rows.append((key, blob, len(blob), now))
+        if not rows:
+            return
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(_UPSERT, rows)
+        self.bytes_written += sum(row[2] for row in rows)
+        if self.max_bytes is not None:
+            self.evict(self.max_bytes)
+
+    def delete(self, key: str) -> None:
+        self._conn().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def __contains__(self, key: str) -> bool:
+        row = self._conn().execute("SELECT 1 FROM cache WHERE key = ?", (key,))
+        return row.fetchone() is not None
+
+    def __len__(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def count(self, prefix: str = "") -> int:
+        # Range scan on the primary key; LIKE would treat "_" in names as a wildcard.
+        row = self._conn().execute(
+            "SELECT COUNT(*) FROM cache WHERE key >= ? AND key < ?",
+            (prefix, prefix + "\U0010ffff"),
+        )
+        return row.fetchone()[0]
+
+    @property
+    def nbytes(self) -> int:
+        """Total size of the stored values in bytes."""
+        return self._conn().execute("SELECT total FROM meta").fetchone()[0]
+
+    def evict(self, max_bytes: int) -> int:
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            excess = self.nbytes - max_bytes
+            if excess <= 0:
+                return 0
+            victims = []
+            for key, size in conn.execute("SELECT key, size FROM cache ORDER BY atime"):
+                victims.append((key,))
+                excess -= size
+                if excess <= 0:
+                    break
+            conn.executemany("DELETE FROM cache WHERE key = ?", victims)
+        return len(victims)
+
+    def compact(self) -> None:
+        conn = self._conn()
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.execute("VACUUM")
+
+
+_STORES: Dict[tuple, CacheStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_store(
+    backend: Union[str, CacheStore],
+    root: str,
+    ext: str = ".pkl",
+    mmap_mode: Optional[str] = None,
+) -> CacheStore:
+    """
+    Resolve a backend name ("file" or "sqlite") to a shared store rooted at `root`.
+
+    The SQLite database lives at `<root>/cache.sqlite` and always pickles values;
+    its size limit is read from the AV_CACHE_MAX_BYTES environment variable.
+    """
+    if isinstance(backend, CacheStore):
+        return backend
+    with _STORES_LOCK:
+        store_key = (backend, root, ext, mmap_mode)
+        store = _STORES.get(store_key)
+        if store is None:
+            if backend == "file":
+                store = FileStore(root, ext, mmap_mode)
+            elif backend == "sqlite":
+                max_bytes = os.environ.get("AV_CACHE_MAX_BYTES")
+                store = SqliteStore(
+                    osp.join(root, "cache.sqlite"),
+                    max_bytes=int(max_bytes) if max_bytes else None,
+                )
+            else:
+                raise ValueError(f"Unknown cache backend {backend}")
+            _STORES[store_key] = store
+        return store
+
+
+# Longest first, so that "x.pkl.zst" is not taken for a ".zst" file named "x.pkl".
+_FILE_EXTS = (".pkl.zst", ".pkl.lz4", ".pkl.gz", ".pkl5", ".pkl", ".json", ".npy")
+
+# Top-level directories of a cache root that do not hold decorator entries:
+# `loads/` is the `load_by_ext` cache (see `load_cache.LOAD_CACHE_DIR`).
+_SKIP_DIRS = ("loads",)
+
+
+def migrate_cache_dir(
+    src_dir: str,
+    dst: Optional[CacheStore] = None,
+    remove: bool = False,
+    batch_size: int = 1000,
+) -> int:
+    """
+    Copy a one-file-per-key cache directory into a single store.
+
+    Every cache file (`.pkl`, `.json`, `.pkl5`, `.npy`, ...) under `src_dir` is
+    stored under its relative path without extension, which is the key the
+    decorators use. Returns the number of migrated entries; with `remove=True` the
+    source files are deleted afterwards. The `load_by_ext` cache (`loads/`) is left
+    alone.
+    """
+    if dst is None:
+        dst = get_store("sqlite", src_dir)
+    batch: List[Tuple[str, Any]] = []
+    paths: List[str] = []
+    count = 0
+
+    def flush():
+        nonlocal count
+        dst.put_many(batch)
+        if remove:
+            for path in paths:
+                os.remove(path)
+        count += len(batch)
+        batch.clear()
+        paths.clear()
+
+    for dirpath, dirnames, filenames in os.walk(src_dir):
+        if dirpath == src_dir:
+            dirnames[:] = [name for name in dirnames if name not in _SKIP_DIRS]
+        for name in filenames:
+            ext = next((ext for ext in _FILE_EXTS if name.endswith(ext)), None)
+            if ext is None or name.startswith("."):
+                continue
+            stem = name[: -len(ext)]
+            path = osp.join(dirpath, name)
+            key = osp.relpath(osp.join(dirpath, stem), src_dir).replace(os.sep, "/")
+            try:
+                batch.append((key, load_json_or_pickle(path)))
+                paths.append(path)
+            except Exception as e:
+                logger.warning(f"Skip unreadable cache file {path}: {e}")
+            if len(batch) >= batch_size:
+                flush()
+    flush()
+    logger.info(f"Migrated {count} cache entries from {src_dir}")
+    return count
+
+
+__all__ = [
+    "CacheStore",
+    "FileStore",
+    "SqliteStore",
+    "get_store",
+    "migrate_cache_dir",
+    "file_lock",
+]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Migrate a speedy_utils cache directory into a SQLite store"
+    )
+    parser.add_argument("src_dir", nargs="?", default=osp.expanduser("~/.cache/av"))
+    parser.add_argument("--db", default=None, help="Defaults to <src_dir>/cache.sqlite")
+    parser.add_argument("--remove", action="store_true", help="Delete migrated files")
+    args = parser.parse_args()
+    store = SqliteStore(args.db or osp.join(args.src_dir, "cache.sqlite"))
+    migrate_cache_dir(args.src_dir, store, remove=args.remove)
+    store.compact()
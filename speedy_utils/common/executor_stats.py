@@ -0,0 +1,189 @@
+# utils/executor_stats.py
+
+import heapq
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from tabulate import tabulate
+
+# Upper bounds (seconds) of the latency histogram buckets.
+LATENCY_BUCKETS = (0.001, 0.01, 0.1, 1.0, 10.0, float("inf"))
+
+
+class _TimedResult:
+    __slots__ = ("value", "worker", "start", "end")
+
+    def __init__(self, value: Any, worker: str, start: float, end: float):
+        self.value = value
+        self.worker = worker
+        self.start = start
+        self.end = end
+
+    def __getstate__(self):
+        return (self.value, self.worker, self.start, self.end)
+
+    def __setstate__(self, state):
+        self.value, self.worker, self.start, self.end = state
+
+
+class _Timed:
+    """Picklable wrapper recording where and when each call ran."""
+
+    def __init__(self, func):
+        self.func = func
+
+    def __call__(self, *args, **kwargs):
+        start = time.time()
+        value = self.func(*args, **kwargs)
+        worker = f"{os.getpid()}:{threading.current_thread().name}"
+        return _TimedResult(value, worker, start, time.time())
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+class ExecutorStats:
+    """
+    Per-item timings of one `multi_thread` / `multi_process` / `multi_hybrid` run.
+
+    For each item it keeps the worker that ran it, its latency, the queue wait
+    (job start to item start) and the result delay (item end to the parent
+    receiving it, i.e. IPC and in-order buffering). `summary()` aggregates them
+    into percentiles, a latency histogram, per-worker busy/idle time and the
+    `top_k` slowest inputs; `report()` renders the summary as text.
+
+    Usage:
+        stats = ExecutorStats()
+        results = multi_process(func, inputs, stats=stats)
+        stats.summary()["latency"]["p99"]
+    """
+
+    def __init__(self, top_k: int = 10):
+        self.top_k = top_k
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        # (index, worker, start, end, received)
+        self.records: List[Tuple[int, str, float, float, float]] = []
+
+    def start(self) -> None:
+        self.started = time.time()
+        self.finished = None
+        self.records = []
+
+    def add(self, index: int, timed: Any) -> Any:
+        """Record one timed output and return the wrapped value."""
+        if not isinstance(timed, _TimedResult):
+            return timed  # failed outside the timed call
+        received = time.time()
+        self.records.append((index, timed.worker, timed.start, timed.end, received))
+        return timed.value
+
+    def finish(self) -> None:
+        self.finished = time.time()
+
+    def summary(self) -> Dict[str, Any]:
+        wall = (self.finished or time.time()) - (self.started or time.time())
+        latencies = sorted(end - start for _, _, start, end, _ in self.records)
+        waits = sorted(start - self.started for _, _, start, _, _ in self.records)
+        delays = sorted(received - end for _, _, _, end, received in self.records)
+
+        def describe(values: List[float]) -> Dict[str, float]:
+            return {
+                "mean": sum(values) / len(values) if values else 0.0,
+                "p50": _percentile(values, 0.50),
+                "p95": _percentile(values, 0.95),
+                "p99": _percentile(values, 0.99),
+                "max": values[-1] if values else 0.0,
+            }
+
+        histogram = {}
+        lower = 0.0
+        position = 0
+        for upper in LATENCY_BUCKETS:
+            count = 0
+            while position < len(latencies) and latencies[position] < upper:
+                count += 1
+                position += 1
+            label = f">={lower:g}s" if upper == float("inf") else f"<{upper:g}s"
+            histogram[label] = count
+            lower = upper
+
+        busy: Dict[str, float] = defaultdict(float)
+        items: Dict[str, int] = defaultdict(int)
+        for _, worker, start, end, _ in self.records:
+            busy[worker] += end - start
+            items[worker] += 1
+        workers = {
+            worker: {
+                "items": items[worker],
+                "busy": busy[worker],
+                "idle": max(0.0, wall - busy[worker]),
+                "utilization": busy[worker] / wall if wall > 0 else 0.0,
+            }
+            for worker in sorted(busy)
+        }
+        slowest = heapq.nlargest(
+            self.top_k, self.records, key=lambda record: record[3] - record[2]
+        )
+        return {
+            "items": len(self.records),
+            "wall": wall,
+            "throughput": len(self.records) / wall if wall > 0 else 0.0,
+            "latency": describe(latencies),
+            "histogram": histogram,
+            "queue_wait": describe(waits),
+            "result_delay": describe(delays),
+            "workers": workers,
+            "slowest": [(index, end - start) for index, _, start, end, _ in slowest],
+        }
+
+    def report(self) -> str:
+        summary = self.summary()
+        quantiles = ("mean", "p50", "p95", "p99", "max")
+        timings = [
+            [name, *(f"{summary[key][q]:.4f}" for q in quantiles)]
+            for name, key in (
+                ("latency (s)", "latency"),
+                ("queue wait (s)", "queue_wait"),
+                ("result delay (s)", "result_delay"),
+            )
+        ]
+        workers = [
+            [
+                worker,
+                row["items"],
+                f"{row['busy']:.2f}",
+                f"{row['idle']:.2f}",
+                f"{row['utilization']:.0%}",
+            ]
+            for worker, row in summary["workers"].items()
+        ]
+        lines = [
+            f"{summary['items']} items in {summary['wall']:.2f}s "
+            f"({summary['throughput']:.1f} items/s)",
+            tabulate(timings, headers=["", *quantiles]),
+            "histogram: "
+            + ", ".join(f"{label}: {n}" for label, n in summary["histogram"].items()),
+            tabulate(
+                workers, headers=["worker", "items", "busy (s)", "idle (s)", "utilization"]
+            ),
+            "slowest: "
+            + ", ".join(f"#{i} {latency:.3f}s" for i, latency in summary["slowest"]),
+        ]
+        return "\n".join(lines)
+
+
+def resolve_stats(stats: Any) -> Optional[ExecutorStats]:
+    """`stats` argument of the executors: True for a fresh ExecutorStats, or one to fill."""
+    if stats is True:
+        return ExecutorStats()
+    return stats or None
+
+
+__all__ = ["ExecutorStats"]
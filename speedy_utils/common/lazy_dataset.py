@@ -0,0 +1,205 @@
+# utils/lazy_dataset.py
+
+import bisect
+import contextlib
+import csv
+import mmap
+import numbers
+import os
+import os.path as osp
+import threading
+from collections import OrderedDict
+from glob import glob
+from typing import Any, Callable, Iterator, List, Optional, Sequence, Tuple, Union
+
+LAZY_EXTS = (".jsonl", ".txt", ".csv", ".tsv", ".npy")
+
+# Bytes scanned at a time while indexing line offsets.
+_INDEX_BLOCK = 64 << 20
+_WHITESPACE = list(b" \t\r\x0b\x0c")
+
+# Maps (and `.npy` memmaps) kept open across all shards, most recently used last.
+# Evicted ones are only dereferenced, so rows or iterators still using them stay
+# valid, and their file descriptor is released once the last user is gone.
+_OPEN: "OrderedDict[Tuple[str, int], Any]" = OrderedDict()
+_OPEN_LOCK = threading.Lock()
+_MAX_OPEN = 64
+
+
+def _line_spans(mm: Any, start: int = 0, skip_blank: bool = True) -> Any:
+    """
+    (starts, ends) arrays of the lines of a mapped file, from `start`.
+
+    With `skip_blank`, whitespace-only lines are left out (as `iter_jsonl` and
+    pandas do); otherwise only the empty remainder after a final newline is, to
+    match `str.splitlines`.
+    """
+    import numpy as np
+
+    size = len(mm)
+    data = np.frombuffer(mm, np.uint8) if size else np.empty(0, np.uint8)
+    newlines = []
+    for pos in range(start, size, _INDEX_BLOCK):
+        block = data[pos : pos + _INDEX_BLOCK]
+        newlines.append(np.flatnonzero(block == 10) + pos)
+    newlines = np.concatenate(newlines) if newlines else np.empty(0, np.int64)
+    starts = np.concatenate(([start], newlines + 1)).astype(np.int64)
+    ends = np.concatenate((newlines, [size])).astype(np.int64)
+    if not skip_blank:
+        if ends[-1] == starts[-1]:
+            starts, ends = starts[:-1], ends[:-1]
+        return starts, ends
+    keep = ends > starts
+    # Only lines starting with whitespace can be blank: check those one by one.
+    first = np.zeros(len(starts), np.uint8)
+    first[keep] = data[starts[keep]]
+    for i in np.flatnonzero(keep & np.isin(first, _WHITESPACE)):
+        keep[i] = bool(mm[starts[i] : ends[i]].strip())
+    return starts[keep], ends[keep]
+
+
+def _open_cached(key: Tuple[str, int], opener: Callable[[str], Any]) -> Any:
+    """Open map of shard `key` (path, mtime), reusing one of the recent ones."""
+    with _OPEN_LOCK:
+        handle = _OPEN.get(key)
+        if handle is not None:
+            _OPEN.move_to_end(key)
+            return handle
+    handle = opener(key[0])
+    with _OPEN_LOCK:
+        handle = _OPEN.setdefault(key, handle)
+        _OPEN.move_to_end(key)
+        while len(_OPEN) > _MAX_OPEN:
+            _OPEN.popitem(last=False)
+    return handle
+
+
+def _map_file(path: str) -> mmap.mmap:
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _load_npy(path: str) -> Any:
+    import numpy as np
+
+    return np.load(path, mmap_mode="r")
+
+
+class _Shard:
+    """One file of a LazyDataset: a row index plus an on-demand mmap."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.ext = osp.splitext(path)[1]
+        if self.ext not in LAZY_EXTS:
+            raise ValueError(f"Lazy loading of {self.ext} files is not supported")
+        stat = os.stat(path)
+        self.key = (path, stat.st_mtime_ns)
+        self.header: Optional[List[str]] = None
+        if self.ext == ".npy":
+            self.length = len(self.array)
+            return
+        if not stat.st_size:
+            self.starts = self.ends = []
+            self.length = 0
+            return
+        # Index through a private map, closed right away: a corpus can have more
+        # shards than the process may keep files open.
+        with contextlib.closing(_map_file(path)) as mm:
+            first = 0
+            if self.ext in (".csv", ".tsv"):
+                newline = mm.find(b"\n")
+                first = len(mm) if newline == -1 else newline + 1
+                self.header = self._split(mm[:first])
+            self.starts, self.ends = _line_spans(mm, first, skip_blank=self.ext != ".txt")
+        self.length = len(self.starts)
+
+    @property
+    def mm(self) -> mmap.mmap:
+        return _open_cached(self.key, _map_file)
+
+    @property
+    def array(self) -> Any:
+        return _open_cached(self.key, _load_npy)
+
+    def _split(self, line: bytes) -> List[str]:
+        delimiter = "\t" if self.ext == ".tsv" else ","
+        return next(csv.reader([line.decode("utf-8").rstrip("\r\n")], delimiter=delimiter))
+
+    def _decode(self, line: bytes) -> Any:
+        if self.ext == ".jsonl":
+            from .utils_io import _json_loads
+
+            return _json_loads(line)
+        if self.ext == ".txt":
+            return line.decode("utf-8").rstrip("\r")
+        return dict(zip(self.header, self._split(line)))
+
+    def get(self, i: int) -> Any:
+        if self.ext == ".npy":
+            return self.array[i]
+        return self._decode(self.mm[self.starts[i] : self.ends[i]])
+
+    def __iter__(self) -> Iterator[Any]:
+        if self.ext == ".npy":
+            yield from self.array
+            return
+        mm = self.mm if self.length else None
+        for start, end in zip(self.starts, self.ends):
+            yield self._decode(mm[start:end])
+
+
+class LazyDataset:
+    """
+    Read-only, row-addressable view over one or many `.jsonl`, `.txt`, `.csv`,
+    `.tsv` or `.npy` shards.
+
+    Opening only indexes line offsets (a vectorised newline scan of each
+    memory-mapped file); a row is decoded when it is accessed. Supports `len()`,
+    global integer indexing, slices, lists of indices and iteration. CSV/TSV rows
+    come back as dicts keyed by the header, `.npy` rows as memory-mapped arrays.
+    The handle is picklable and reopens its maps in the receiving process, so it
+    can be passed to `multi_process` workers.
+
+    Usage:
+        ds = LazyDataset("corpus/*.jsonl")
+        len(ds), ds[123_456], ds[-10:]
+        sample = ds[random.sample(range(len(ds)), 100)]
+    """
+
+    def __init__(self, paths: Union[str, Sequence[str]]):
+        if isinstance(paths, str):
+            paths = sorted(glob(paths)) if "*" in paths else [paths]
+        self.shards = [_Shard(path) for path in paths]
+        self.offsets = [0]
+        for shard in self.shards:
+            self.offsets.append(self.offsets[-1] + shard.length)
+
+    def __len__(self) -> int:
+        return self.offsets[-1]
+
+    def _locate(self, index: int):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f"Row {index} out of range for {len(self)} rows")
+        shard = bisect.bisect_right(self.offsets, index) - 1
+        return self.shards[shard], index - self.offsets[shard]
+
+    def __getitem__(self, index: Union[int, slice, Sequence[int]]) -> Any:
+        if isinstance(index, numbers.Integral):
+            shard, row = self._locate(int(index))
+            return shard.get(row)
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return [self[int(i)] for i in index]
+
+    def __iter__(self) -> Iterator[Any]:
+        for shard in self.shards:
+            yield from shard
+
+    def __repr__(self) -> str:
+        return f"LazyDataset({len(self.shards)} shards, {len(self)} rows)"
+
+
+__all__ = ["LazyDataset"]
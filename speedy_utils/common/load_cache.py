@@ -0,0 +1,130 @@
+# utils/load_cache.py
+
+import json
+import os
+import os.path as osp
+import time
+from typing import Any, Callable, Dict, Optional
+
+import xxhash
+from loguru import logger
+
+from .cache_stats import register_stats
+from .utils_cache import SPEED_CACHE_DIR
+from .utils_hash import fast_hash
+from .utils_io import _dump_pkl5, _load_pkl5, atomic_open
+
+LOAD_CACHE_DIR = osp.join(SPEED_CACHE_DIR, "loads")
+
+# Bytes read at a time when hashing file contents.
+_HASH_BLOCK = 8 << 20
+
+try:
+    import pyarrow.feather  # noqa: F401
+
+    _HAS_FEATHER = True
+except ImportError:  # DataFrames are cached as .pkl5 instead
+    _HAS_FEATHER = False
+
+
+def file_fingerprint(path: str, hash_content: bool = False) -> Dict[str, Any]:
+    """
+    Absolute path, size and mtime of `path`, plus an xxh3 digest of its bytes with
+    `hash_content=True` (catches edits that preserve size and mtime, at the cost of
+    reading the file).
+    """
+    st = os.stat(path)
+    fingerprint = {
+        "path": osp.abspath(path),
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+    }
+    if hash_content:
+        h = xxhash.xxh3_128()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(_HASH_BLOCK), b""):
+                h.update(block)
+        fingerprint["xxh3"] = h.hexdigest()
+    return fingerprint
+
+
+def _is_frame(obj: Any) -> bool:
+    return type(obj).__module__.split(".")[0] == "pandas" and hasattr(obj, "columns")
+
+
+def _write_entry(obj: Any, entry: str) -> str:
+    if _HAS_FEATHER and _is_frame(obj):
+        try:
+            with atomic_open(entry + ".feather") as f:
+                obj.to_feather(f)
+            return ".feather"
+        except (ValueError, TypeError) as e:  # e.g. non-default index
+            logger.debug(f"Caching DataFrame as .pkl5 instead of Feather: {e}")
+    with atomic_open(entry + ".pkl5") as f:
+        _dump_pkl5(obj, f)
+    return ".pkl5"
+
+
+def _read_entry(entry: str, fmt: str) -> Any:
+    if fmt == ".feather":
+        import pandas as pd
+
+        return pd.read_feather(entry + fmt)
+    return _load_pkl5(entry + fmt)
+
+
+def cached_load(
+    path: str,
+    load_fn: Callable[[str], Any],
+    hash_content: bool = False,
+    cache_dir: str = LOAD_CACHE_DIR,
+) -> Any:
+    """
+    `load_fn(path)`, cached on disk until the file's fingerprint changes.
+
+    Each source path owns one entry under `cache_dir`: a sidecar `.json` holding the
+    fingerprint and the parsed result in a fast binary form, Feather for
+    DataFrames when pyarrow is installed and `.pkl5` (pickle protocol 5 with
+    out-of-band buffers) otherwise. A stale entry is overwritten by the next load.
+    """
+    stats = _STATS
+    fingerprint = file_fingerprint(path, hash_content)
+    entry = osp.join(cache_dir, fast_hash(fingerprint["path"]))
+    start = time.perf_counter()
+    try:
+        with open(entry + ".json", "r", encoding="utf-8") as f:
+            meta: Optional[Dict[str, Any]] = json.load(f)
+    except (OSError, ValueError):
+        meta = None
+    if meta is not None and meta["fingerprint"] == fingerprint:
+        try:
+            result = _read_entry(entry, meta["format"])
+            stats.record_hit(time.perf_counter() - start)
+            return result
+        except Exception as e:
+            stats.record_error()
+            logger.warning(f"Ignoring unreadable load cache of {path}: {e}")
+
+    start = time.perf_counter()
+    result = load_fn(path)
+    compute_time = time.perf_counter() - start
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        fmt = _write_entry(result, entry)
+        with atomic_open(entry + ".json", "w", encoding="utf-8") as f:
+            json.dump({"fingerprint": fingerprint, "format": fmt}, f)
+        if meta is not None and meta.get("format") not in (None, fmt):
+            try:
+                os.remove(entry + meta["format"])
+            except FileNotFoundError:
+                pass
+    except Exception as e:
+        stats.record_error()
+        logger.warning(f"Could not cache the parsed {path}: {e}")
+    stats.record_miss(compute_time, time.perf_counter() - start - compute_time)
+    return result
+
+
+_STATS = register_stats(cached_load, "load_by_ext")
+
+__all__ = ["cached_load", "file_fingerprint"]
@@ -0,0 +1,225 @@
+# utils/lru_cache.py
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Iterator, NamedTuple, Optional
+
+_MISSING = object()
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    currsize: int
+    maxsize: Optional[int]
+    nbytes: int
+    max_bytes: Optional[int]
+
+
+def approx_sizeof(obj: Any, _depth: int = 0) -> int:
+    """Approximate the memory footprint of an object in bytes."""
+    nbytes = getattr(obj, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes
+    size = sys.getsizeof(obj)
+    if _depth >= 4:
+        return size
+    if isinstance(obj, dict):
+        size += sum(
+            approx_sizeof(k, _depth + 1) + approx_sizeof(v, _depth + 1)
+            for k, v in obj.items()
+        )
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(approx_sizeof(v, _depth + 1) for v in obj)
+    return size
+
+
+class _Shard:
+    __slots__ = ("lock", "data", "nbytes", "max_entries", "max_bytes")
+
+    def __init__(self, max_entries: Optional[int], max_bytes: Optional[int]):
+        self.lock = threading.Lock()
+        # key -> (value, size, expires_at)
+        self.data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.nbytes = 0
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+
+class LRUCache:
+    """
+    Thread-safe in-memory cache with LRU eviction and optional TTL.
+
+    Entries are spread over independently locked shards; each shard evicts its own
+    least recently used entries once it exceeds its share of `max_entries`.
+    Eviction is therefore LRU per shard; small caches use a single shard and are
+    strictly LRU. Caches bounded by `max_bytes` (sizes are estimated with
+    `approx_sizeof`) always use one shard, so any value up to the whole budget fits.
+
+    Usage:
+        cache = LRUCache(max_entries=10_000, max_bytes=2**30, ttl=3600)
+        cache["key"] = value
+        cache.get("key")
+        cache.cache_info()
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = None,
+        shards: int = 8,
+    ):
+        if max_bytes is not None:
+            shards = 1
+        elif max_entries is not None:
+            shards = max(1, min(shards, max_entries // 64))
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._shards = [
+            _Shard(
+                _split(max_entries, shards, i),
+                _split(max_bytes, shards, i),
+            )
+            for i in range(shards)
+        ]
+        self._stats_lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def _shard(self, key: Hashable) -> _Shard:
+        return self._shards[hash(key) % len(self._shards)]
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for `key`, or `default` on a miss."""
+        shard = self._shard(key)
+        expired = False
+        with shard.lock:
+            entry = shard.data.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, size, expires_at = entry
+                if expires_at is not None and expires_at <= time.monotonic():
+                    del shard.data[key]
+                    shard.nbytes -= size
+                    expired = True
+                else:
+                    shard.data.move_to_end(key)
+                    with self._stats_lock:
+                        self._hits += 1
+                    return value
+        with self._stats_lock:
+            self._misses += 1
+            self._expirations += expired
+        return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Insert or replace `key`, evicting least recently used entries as needed."""
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        size = approx_sizeof(value) if self.max_bytes is not None else 0
+        shard = self._shard(key)
+        evicted = 0
+        with shard.lock:
+            old = shard.data.pop(key, _MISSING)
+            if old is not _MISSING:
+                shard.nbytes -= old[1]
+            if shard.max_bytes is not None and size > shard.max_bytes:
+                return
+            shard.data[key] = (value, size, expires_at)
+            shard.nbytes += size
+            while (
+                shard.max_entries is not None and len(shard.data) > shard.max_entries
+            ) or (shard.max_bytes is not None and shard.nbytes > shard.max_bytes):
+                _, (_, old_size, _) = shard.data.popitem(last=False)
+                shard.nbytes -= old_size
+                evicted += 1
+        if evicted:
+            with self._stats_lock:
+                self._evictions += evicted
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        shard = self._shard(key)
+        with shard.lock:
+            entry = shard.data.pop(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            shard.nbytes -= entry[1]
+            return entry[0]
+
+    def clear(self) -> None:
+        for shard in self._shards:
+            with shard.lock:
+                shard.data.clear()
+                shard.nbytes = 0
+        with self._stats_lock:
+            self._hits = self._misses = self._evictions = self._expirations = 0
+
+    def cache_info(self) -> CacheInfo:
+        """Return hit/miss/eviction statistics and the current size of the cache."""
+        currsize = nbytes = 0
+        for shard in self._shards:
+            with shard.lock:
+                currsize += len(shard.data)
+                nbytes += shard.nbytes
+        with self._stats_lock:
+            return CacheInfo(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                expirations=self._expirations,
+                currsize=currsize,
+                maxsize=self.max_entries,
+                nbytes=nbytes,
+                max_bytes=self.max_bytes,
+            )
+
+    def __getitem__(self, key: Hashable) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        self.set(key, value)
+
+    def __delitem__(self, key: Hashable) -> None:
+        if self.pop(key, _MISSING) is _MISSING:
+            raise KeyError(key)
+
+    def __contains__(self, key: Hashable) -> bool:
+        shard = self._shard(key)
+        with shard.lock:
+            entry = shard.data.get(key, _MISSING)
+        if entry is _MISSING:
+            return False
+        expires_at = entry[2]
+        return expires_at is None or expires_at > time.monotonic()
+
+    def __len__(self) -> int:
+        return sum(len(shard.data) for shard in self._shards)
+
+    def __iter__(self) -> Iterator[Hashable]:
+        for shard in self._shards:
+            with shard.lock:
+                keys = list(shard.data)
+            yield from keys
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.cache_info()})"
+
+
+def _split(total: Optional[int], parts: int, index: int) -> Optional[int]:
+    """Share of `total` assigned to shard `index` out of `parts`."""
+    if total is None:
+        return None
+    return total // parts + (1 if index < total % parts else 0)
+
+
+__all__ = ["LRUCache", "CacheInfo", "approx_sizeof"]
@@ -0,0 +1,266 @@
+# utils/rate_limit.py
+
+import asyncio
+import random
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Any, Awaitable, Callable, Iterator, Optional
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled at `rate` tokens per second up to `capacity`.
+
+    `reserve(n)` takes `n` tokens immediately, letting the balance go negative, and
+    returns how long the caller must wait before using them. Reservations are
+    served in order, so concurrent callers are spaced out instead of racing.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = rate if capacity is None else capacity
+        self._tokens = self.capacity
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float = 1.0) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._stamp) * self.rate
+            )
+            self._stamp = now
+            self._tokens -= amount
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self, amount: float = 1.0) -> None:
+        wait = self.reserve(amount)
+        if wait:
+            time.sleep(wait)
+
+    async def aacquire(self, amount: float = 1.0) -> None:
+        wait = self.reserve(amount)
+        if wait:
+            await asyncio.sleep(wait)
+
+
+class AIMDWindow:
+    """
+    Concurrency limit that adapts to throttling, AIMD-style.
+
+    Each success grows the limit by `increase / limit` (about `increase` per full
+    window of completions, up to `max_limit`). A throttling error, or a call slower
+    than `latency_target`, multiplies it by `decrease` (down to `min_limit`), at
+    most once per `cooldown` seconds so one burst of 429s counts as one signal.
+    """
+
+    def __init__(
+        self,
+        max_limit: int,
+        min_limit: int = 1,
+        initial: Optional[int] = None,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        latency_target: Optional[float] = None,
+        cooldown: float = 1.0,
+    ):
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.limit = float(max_limit if initial is None else initial)
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_target = latency_target
+        self.cooldown = cooldown
+        self.active = 0
+        self._last_decrease = float("-inf")
+        self._cond = threading.Condition()
+
+    @property
+    def size(self) -> int:
+        return max(self.min_limit, int(self.limit))
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """Block until the number of active calls is below the current limit."""
+        with self._cond:
+            while self.active >= self.size:
+                self._cond.wait()
+            self.active += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.active -= 1
+                self._cond.notify_all()
+
+    def on_success(self, latency: float) -> None:
+        with self._cond:
+            if self.latency_target is not None and latency > self.latency_target:
+                self._decrease()
+                return
+            self.limit = min(self.max_limit, self.limit + self.increase / self.limit)
+            self._cond.notify_all()
+
+    def on_throttle(self) -> None:
+        with self._cond:
+            self._decrease()
+
+    def _decrease(self) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self.limit = max(self.min_limit, self.limit * self.decrease)
+
+
+def is_throttle_error(exc: BaseException) -> bool:
+    """True for HTTP 429 / 503 errors from requests, httpx, urllib or openai clients."""
+    response = getattr(exc, "response", None)
+    for status in (
+        getattr(exc, "status_code", None),
+        getattr(exc, "code", None),
+        getattr(response, "status_code", None),
+        getattr(response, "status", None),
+    ):
+        if status in (429, 503):
+            return True
+    return False
+
+
+class RateLimiter:
+    """
+    Request and token rate limits plus an adaptive concurrency window for API calls.
+
+    Args:
+        rps: Requests per second (token bucket, bursts up to one second's worth).
+        tpm: Tokens per minute, charged `count_tokens(item)` per call.
+        count_tokens: Estimate of the tokens an input will consume.
+        max_concurrency: Enables the AIMD window, starting at this size.
+        min_concurrency: Lower bound of the window.
+        latency_target: Calls slower than this (seconds) shrink the window too.
+        is_throttle: Classifies exceptions as throttling signals.
+        cooldown: Minimum seconds between two window decreases.
+        throttle_retries: Retries of a throttled call, after `throttle_backoff`
+            seconds doubling on each attempt.
+
+    Usage:
+        limiter = RateLimiter(rps=10, tpm=90_000, count_tokens=len, max_concurrency=32)
+        results = multi_thread(call_api, prompts, workers=32, limiter=limiter)
+    """
+
+    def __init__(
+        self,
+        rps: Optional[float] = None,
+        tpm: Optional[float] = None,
+        count_tokens: Optional[Callable[[Any], float]] = None,
+        max_concurrency: Optional[int] = None,
+        min_concurrency: int = 1,
+        latency_target: Optional[float] = None,
+        is_throttle: Callable[[BaseException], bool] = is_throttle_error,
+        cooldown: float = 1.0,
+        throttle_retries: int = 0,
+        throttle_backoff: float = 1.0,
+    ):
+        if tpm is not None and count_tokens is None:
+            raise ValueError("tpm needs count_tokens to know what each call costs")
+        self.requests = TokenBucket(rps, capacity=max(1.0, rps)) if rps else None
+        self.tokens = TokenBucket(tpm / 60, capacity=tpm) if tpm else None
+        self.count_tokens = count_tokens
+        self.window = (
+            AIMDWindow(
+                max_concurrency,
+                min_concurrency,
+                latency_target=latency_target,
+                cooldown=cooldown,
+            )
+            if max_concurrency
+            else None
+        )
+        self.is_throttle = is_throttle
+        self.throttle_retries = throttle_retries
+        self.throttle_backoff = throttle_backoff
+
+    def concurrency(self, default: int) -> int:
+        """Current window size, capped by `default`."""
+        return default if self.window is None else min(default, self.window.size)
+
+    def _reserve(self, item: Any) -> float:
+        wait = 0.0
+        if self.requests is not None:
+            wait = self.requests.reserve()
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.reserve(self.count_tokens(item)))
+        return wait
+
+    def _feedback(self, start: float, exc: Optional[BaseException]) -> None:
+        if self.window is None:
+            return
+        if exc is None:
+            self.window.on_success(time.monotonic() - start)
+        elif self.is_throttle(exc):
+            self.window.on_throttle()
+
+    def _throttle_delay(self, exc: Exception, attempt: int) -> Optional[float]:
+        """Seconds to wait before retrying a throttled call, or None to give up."""
+        if attempt > self.throttle_retries or not self.is_throttle(exc):
+            return None
+        return self.throttle_backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.0)
+
+    def call(self, func: Callable, item: Any) -> Any:
+        """
+        Run `func(item)` inside a window slot once the rate limits allow it.
+
+        Throttled calls are retried up to `throttle_retries` times, waiting
+        outside the window so other calls can use the freed slot.
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            with self.window.slot() if self.window is not None else nullcontext():
+                wait = self._reserve(item)
+                if wait:
+                    time.sleep(wait)
+                start = time.monotonic()
+                try:
+                    result = func(item)
+                except Exception as exc:
+                    self._feedback(start, exc)
+                    delay = self._throttle_delay(exc, attempt)
+                    if delay is None:
+                        raise
+                else:
+                    self._feedback(start, None)
+                    return result
+            time.sleep(delay)
+
+    async def acall(self, func: Callable[[Any], Awaitable], item: Any) -> Any:
+        """
+        Await `func(item)` once the rate limits allow it, retrying throttled calls.
+
+        The window is not enforced here: async callers size their task window
+        with `concurrency()` instead.
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            wait = self._reserve(item)
+            if wait:
+                await asyncio.sleep(wait)
+            start = time.monotonic()
+            try:
+                result = await func(item)
+            except Exception as exc:
+                self._feedback(start, exc)
+                delay = self._throttle_delay(exc, attempt)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+            else:
+                self._feedback(start, None)
+                return result
+
+
+__all__ = ["TokenBucket", "AIMDWindow", "RateLimiter", "is_throttle_error"]
@@ -0,0 +1,209 @@
+# utils/shared_array.py
+
+import os
+import os.path as osp
+from collections import OrderedDict
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Tuple
+
+# Segments attached by this process, most recently used last. Handles of the
+# same segment arrive in many pickled inputs, so recent ones stay attached; older
+# ones are detached once no array built on them is alive (see `_Pinned`).
+_ATTACHED: "OrderedDict[str, shared_memory.SharedMemory]" = OrderedDict()
+_MAX_ATTACHED = 16
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    shm = _ATTACHED.get(name)
+    if shm is None:
+        shm = _ATTACHED[name] = shared_memory.SharedMemory(name=name)
+        while len(_ATTACHED) > _MAX_ATTACHED:
+            _ATTACHED.popitem(last=False)
+    _ATTACHED.move_to_end(name)
+    return shm
+
+
+class _Pinned:
+    """
+    Array interface over a shared memory segment that holds on to the segment.
+
+    NumPy keeps no buffer export on a SharedMemory mapping, so closing it while
+    arrays still point into it would leave them dangling. Arrays built from this
+    object (and their slices) reference it as their base instead, and the segment
+    is only closed, by garbage collection, once the last of them is gone.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, shape: Tuple[int, ...], dtype: str):
+        import numpy as np
+
+        self.shm = shm
+        address = np.frombuffer(shm.buf, np.uint8).ctypes.data
+        self.__array_interface__ = {
+            "shape": tuple(shape),
+            "typestr": dtype,
+            "data": (address, False),
+            "version": 3,
+        }
+
+
+class SharedArray:
+    """
+    Picklable handle to a NumPy array in shared memory or in a `.npy` memory map.
+
+    The handle only carries the segment name (or file path), shape and dtype, so
+    sending it to a worker costs a few bytes. `view()` rebuilds a zero-copy array
+    over the shared buffer. The creating process owns the data and must call
+    `unlink()` (or use the handle as a context manager) once workers are done.
+    """
+
+    def __init__(
+        self,
+        shape: Tuple[int, ...],
+        dtype: str,
+        name: Optional[str] = None,
+        path: Optional[str] = None,
+    ):
+        self.shape = shape
+        self.dtype = dtype
+        self.name = name
+        self.path = path
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._view = None
+
+    @classmethod
+    def create(cls, array: Any, path: Optional[str] = None) -> "SharedArray":
+        """
+        Copy `array` once into a new shared memory segment, or into the `.npy` file
+        `path` when given (useful when /dev/shm is small).
+        """
+        import numpy as np
+
+        array = np.asarray(array)
+        if array.dtype.hasobject:
+            raise TypeError("Object arrays cannot be shared, pickle them instead")
+        if path is not None:
+            out = np.lib.format.open_memmap(
+                path, mode="w+", dtype=array.dtype, shape=array.shape
+            )
+            out[...] = array
+            out.flush()
+            del out
+            return cls(array.shape, array.dtype.str, path=path)
+        shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        handle = cls(array.shape, array.dtype.str, name=shm.name)
+        handle._shm = shm
+        np.ndarray(array.shape, array.dtype, buffer=shm.buf)[...] = array
+        return handle
+
+    def view(self) -> Any:
+        """Zero-copy NumPy view over the shared data."""
+        import numpy as np
+
+        if self._view is not None:
+            return self._view
+        if self.path is not None:
+            self._view = np.load(self.path, mmap_mode="r")
+            return self._view
+        shm = self._shm or _attach(self.name)
+        self._view = np.asarray(_Pinned(shm, self.shape, self.dtype))
+        return self._view
+
+    def unlink(self) -> None:
+        """
+        Release the shared data; existing views, in this process or others, stay
+        valid. The mapping itself is closed once the last view is gone.
+        """
+        self._view = None
+        if self.path is not None:
+            if osp.exists(self.path):
+                os.remove(self.path)
+        elif self._shm is not None:
+            self._shm.unlink()
+            self._shm = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {
+            "shape": self.shape,
+            "dtype": self.dtype,
+            "name": self.name,
+            "path": self.path,
+        }
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(**state)
+
+    def __enter__(self) -> "SharedArray":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.unlink()
+
+    def __repr__(self) -> str:
+        where = self.path or self.name
+        return f"SharedArray({where}, shape={self.shape}, dtype={self.dtype})"
+
+
+class SharedFrame:
+    """
+    Picklable handle to a DataFrame whose numeric columns live in shared memory.
+
+    Columns with object dtype (strings, mixed values) are pickled with the handle.
+    """
+
+    def __init__(self, frame: Any, path: Optional[str] = None):
+        self.names = list(frame.columns)
+        self.index = frame.index
+        self.columns: List[Any] = []
+        for i, (_, column) in enumerate(frame.items()):
+            values = column.to_numpy()
+            if values.dtype.kind in "biufcmM":
+                column_path = None if path is None else f"{path}.{i}.npy"
+                values = SharedArray.create(values, column_path)
+            self.columns.append(values)
+
+    def view(self) -> Any:
+        import pandas as pd
+
+        data = {
+            i: column.view() if isinstance(column, SharedArray) else column
+            for i, column in enumerate(self.columns)
+        }
+        frame = pd.DataFrame(data, index=self.index, copy=False)
+        frame.columns = self.names
+        return frame
+
+    def unlink(self) -> None:
+        for column in self.columns:
+            if isinstance(column, SharedArray):
+                column.unlink()
+
+    def __enter__(self) -> "SharedFrame":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.unlink()
+
+
+def share(obj: Any, path: Optional[str] = None) -> Any:
+    """
+    Move a NumPy array or DataFrame into shared memory and return its handle.
+
+    With `path`, the data goes to memory-mapped `.npy` files under that prefix
+    instead. Other objects are returned unchanged.
+    """
+    module = type(obj).__module__.split(".")[0]
+    if module == "numpy" and hasattr(obj, "__array_interface__"):
+        return SharedArray.create(obj, path if path is None else f"{path}.npy")
+    if module == "pandas" and hasattr(obj, "columns"):
+        return SharedFrame(obj, path)
+    return obj
+
+
+def resolve(obj: Any) -> Any:
+    """Rebuild the zero-copy view behind a handle; other objects pass through."""
+    if isinstance(obj, (SharedArray, SharedFrame)):
+        return obj.view()
+    return obj
+
+
+__all__ = ["SharedArray", "SharedFrame", "share", "resolve"]
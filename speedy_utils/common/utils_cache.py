@@ -1,175 +1,634 @@
 # utils/utils_cache.py
 
+import asyncio
 import functools
 import inspect
 import os
 import os.path as osp
-import pickle
+import threading
+import time
 import traceback
-from typing import Any, Callable, Dict, List, Optional
+import weakref
+from contextlib import contextmanager
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
-import xxhash
 from loguru import logger
 import uuid
 
-from .utils_io import dump_json_or_pickle, load_json_or_pickle
-from .utils_misc import mkdir_or_exist
+from .cache_stats import CacheStats, register_stats
+from .cache_store import CacheStore, get_store
+from .lru_cache import _MISSING, LRUCache
+from .utils_hash import fast_hash
 
 SPEED_CACHE_DIR = osp.join(osp.expanduser("~"), ".cache/av")
-ICACHE: Dict[str, Any] = {}
+CACHE_TYPES = (".pkl", ".json", ".pkl5", ".pkl.zst", ".pkl.lz4", ".pkl.gz", ".npy")
+CACHE_BACKEND = os.environ.get("AV_CACHE_BACKEND", "file")
+ICACHE = LRUCache(max_entries=int(os.environ.get("AV_ICACHE_MAX_ENTRIES", 100_000)))
 
 
 def identify(x: Any) -> str:
-    """Return an hex digest of the input."""
-    return xxhash.xxh64(pickle.dumps(x), seed=0).hexdigest()
+    """Return an hex digest of the input (see `fast_hash`)."""
+    return fast_hash(x)
 
 def identify_uuid(x: Any) -> str:
     id = identify(x)
     return str(uuid.uuid5(uuid.NAMESPACE_DNS, id))
 
 
+class _CallKeyPlan:
+    """
+    Precompiled call-key layout for a decorated function.
+
+    The function fingerprint (source digest) and argument names are resolved once,
+    on first use, so the per-call path only has to hash the call arguments.
+    """
+
+    def __init__(self, func: Callable, ignore_self: bool = False):
+        self.func = func
+        try:
+            self.arg_names = inspect.getfullargspec(func).args
+        except TypeError:
+            self.arg_names = []
+        self.skip_self = (
+            ignore_self and len(self.arg_names) > 0 and self.arg_names[0] == "self"
+        )
+        self._fingerprint: Optional[str] = None
+
+    @property
+    def fingerprint(self) -> str:
+        if self._fingerprint is None:
+            self._fingerprint = identify(_func_source(self.func))
+        return self._fingerprint
+
+    def key(self, args: tuple, kwargs: dict) -> str:
+        """Hash the call arguments together with the function fingerprint."""
+        if self.skip_self:
+            args = args[1:]
+        return identify((self.fingerprint, args, kwargs))
+
+    def bind(self, args: tuple, kwargs: dict) -> Dict[str, Any]:
+        """Map positional and keyword arguments to their parameter names."""
+        bound = dict(zip(self.arg_names, args))
+        bound.update(kwargs)
+        return bound
+
+
+def _func_source(func: Callable) -> str:
+    """Source of `func` with spaces stripped, or a code-based stand-in if unavailable."""
+    try:
+        return inspect.getsource(func).replace(" ", "")
+    except (OSError, TypeError):
+        code = getattr(func, "__code__", None)
+        co_code = code.co_code if code is not None else b""
+        return f"{func.__module__}.{func.__qualname__}:{co_code.hex()}"
+
+
+class _SingleFlight:
+    """Per-key locks so that concurrent threads computing the same key wait for one."""
+
+    def __init__(self):
+        self._mutex = threading.Lock()
+        self._locks: Dict[str, list] = {}  # key -> [lock, number of holders]
+
+    @contextmanager
+    def __call__(self, key: str) -> Iterator[None]:
+        with self._mutex:
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._mutex:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._locks[key]
+
+
+_IN_FLIGHT = _SingleFlight()
+
+
+def _load_or_compute(
+    store: CacheStore, key: str, compute: Callable[[], Any], stats: CacheStats
+) -> Tuple[Any, bool]:
+    """
+    Return `(value, hit)` for `key`, computing and storing it on a miss.
+
+    Misses are deduplicated: threads of this process wait on an in-process lock and
+    processes sharing the cache directory wait on a file lock, then re-check the
+    store, so each key is computed once across the whole worker pool.
+    """
+    start = time.perf_counter()
+    result = store.get(key)
+    if result is not _MISSING:
+        stats.record_hit(time.perf_counter() - start)
+        return result, True
+    with _IN_FLIGHT(key), store.lock(key):
+        result = store.get(key)
+        if result is not _MISSING:
+            stats.record_hit(time.perf_counter() - start)
+            return result, True
+        load_time = time.perf_counter() - start
+        start = time.perf_counter()
+        result = compute()
+        compute_time = time.perf_counter() - start
+        try:
+            store.put(key, result)
+        except Exception as e:
+            stats.record_error()
+            logger.warning(f"Failed to cache {key}: {e}")
+        stats.record_miss(compute_time, load_time)
+        return result, False
+
+
+_ASYNC_IN_FLIGHT: Dict[tuple, "asyncio.Future"] = {}
+
+
+async def _share_in_flight(key: str, compute: Callable[[], Awaitable]) -> Any:
+    """Await `compute()` once per key and event loop; concurrent awaiters share it."""
+    flight_key = (id(asyncio.get_running_loop()), key)
+    task = _ASYNC_IN_FLIGHT.get(flight_key)
+    if task is None:
+        task = asyncio.ensure_future(compute())
+        _ASYNC_IN_FLIGHT[flight_key] = task
+        task.add_done_callback(lambda _: _ASYNC_IN_FLIGHT.pop(flight_key, None))
+    # Shield so that one cancelled awaiter does not cancel the call for the others.
+    return await asyncio.shield(task)
+
+
+async def _aload_or_compute(
+    store: CacheStore, key: str, compute: Callable[[], Awaitable], stats: CacheStats
+) -> Tuple[Any, bool]:
+    """
+    Async counterpart of `_load_or_compute`.
+
+    Store reads and writes run in worker threads so the event loop is never blocked
+    on disk, and concurrent awaiters of the same key share one in-flight task.
+    Deduplication is per event loop; other processes are not coordinated.
+    """
+
+    async def load_or_compute():
+        start = time.perf_counter()
+        result = await asyncio.to_thread(store.get, key)
+        if result is not _MISSING:
+            stats.record_hit(time.perf_counter() - start)
+            return result, True
+        load_time = time.perf_counter() - start
+        start = time.perf_counter()
+        result = await compute()
+        compute_time = time.perf_counter() - start
+        try:
+            await asyncio.to_thread(store.put, key, result)
+        except Exception as e:
+            stats.record_error()
+            logger.warning(f"Failed to cache {key}: {e}")
+        stats.record_miss(compute_time, load_time)
+        return result, False
+
+    return await _share_in_flight(key, load_or_compute)
+
+
 def memoize(
-    func: Callable,
+    func: Optional[Callable] = None,
     ignore_self: bool = True,
     cache_dir: str = SPEED_CACHE_DIR,
     cache_type: str = ".pkl",
     verbose: bool = False,
     cache_key: Optional[str] = None,
+    memory_max_entries: Optional[int] = None,
+    memory_max_bytes: Optional[int] = None,
+    backend: Union[str, CacheStore] = CACHE_BACKEND,
+    mmap_mode: Optional[str] = None,
 ) -> Callable:
-    """Cache result of function call on disk."""
-    assert cache_type in [".pkl", ".json"]
+    """
+    Cache result of function call on disk.
+
+    `cache_type` is any format in CACHE_TYPES (see `dump_json_or_pickle`): e.g.
+    ".pkl.zst" for compressed pickles, or ".npy" for functions returning arrays,
+    combined with `mmap_mode="r"` to map cached arrays instead of reading them.
+
+    `backend` selects the storage: "file" writes one file per call under
+    `cache_dir/funcs/<name>/`, "sqlite" keeps every entry in `cache_dir/cache.sqlite`,
+    and any CacheStore instance is used as is. The default comes from the
+    AV_CACHE_BACKEND environment variable.
+
+    Setting `memory_max_entries` and/or `memory_max_bytes` puts a bounded in-process
+    LRU tier in front of the disk cache: hits are served from memory, disk hits are
+    promoted into memory and new results are written through to both. Values served
+    from memory are shared objects, not fresh copies, so callers must not mutate them.
+
+        @memoize(memory_max_entries=10_000)
+        def load(path): ...
+
+    Coroutine functions are awaited and their results cached; see `_aload_or_compute`.
+    """
+    if func is None:
+        return functools.partial(
+            memoize,
+            ignore_self=ignore_self,
+            cache_dir=cache_dir,
+            cache_type=cache_type,
+            verbose=verbose,
+            cache_key=cache_key,
+            memory_max_entries=memory_max_entries,
+            memory_max_bytes=memory_max_bytes,
+            backend=backend,
+            mmap_mode=mmap_mode,
+        )
+    assert cache_type in CACHE_TYPES, f"cache_type must be one of {CACHE_TYPES}"
     if os.environ.get("AV_MEMOIZE_DISABLE", "0") == "1":
         logger.opt(depth=2).info("Memoize is disabled")
         return func
 
+    plan = _CallKeyPlan(func, ignore_self=ignore_self)
+    store = get_store(backend, cache_dir, cache_type, mmap_mode)
+    key_prefix = f"funcs/{func.__name__}/"
+    stats = register_stats(func, "memoize", store, key_prefix)
+    mem_cache = None
+    if memory_max_entries is not None or memory_max_bytes is not None:
+        mem_cache = LRUCache(max_entries=memory_max_entries, max_bytes=memory_max_bytes)
+
+    def memory_get(func_id: str) -> Any:
+        start = time.perf_counter()
+        result = mem_cache.get(func_id, _MISSING)
+        if result is not _MISSING:
+            stats.record_hit(time.perf_counter() - start, memory=True)
+        return result
+
+    def call_id(args: tuple, kwargs: dict) -> str:
+        if cache_key is not None:
+            if verbose:
+                logger.opt(depth=3).info(f"Use cache_key={kwargs[cache_key]}")
+            return identify([plan.fingerprint, kwargs[cache_key]])
+        return plan.key(args, kwargs)
+
     @functools.wraps(func)
     def memoized_func(*args, **kwargs):
         try:
-            arg_names = inspect.getfullargspec(func).args
-            func_source = inspect.getsource(func).replace(" ", "")
-            if cache_key is not None:
-                logger.opt(depth=2).info(f"Use cache_key={kwargs[cache_key]}")
-                fid = [func_source, kwargs[cache_key]]
-                func_id = identify(fid)
-            elif len(arg_names) > 0 and arg_names[0] == "self" and ignore_self:
-                func_id = identify((func_source, args[1:], kwargs))
-            else:
-                func_id = identify((func_source, args, kwargs))
-
-            cache_path = osp.join(
-                cache_dir, "funcs", func.__name__, f"{func_id}{cache_type}"
+            func_id = call_id(args, kwargs)
+            if mem_cache is not None:
+                result = memory_get(func_id)
+                if result is not _MISSING:
+                    return result
+
+            key = key_prefix + func_id
+            result, hit = _load_or_compute(
+                store, key, lambda: func(*args, **kwargs), stats
             )
-            mkdir_or_exist(os.path.dirname(cache_path))
-            if osp.exists(cache_path):
-                if verbose:
-                    logger.opt(depth=2).info(f"Load from cache file: {cache_path}")
-                result = load_json_or_pickle(cache_path)
-            else:
-                result = func(*args, **kwargs)
-                dump_json_or_pickle(result, cache_path)
+            if hit and verbose:
+                logger.opt(depth=2).info(f"Load from cache: {key}")
+            if mem_cache is not None:
+                mem_cache[func_id] = result
             return result
         except Exception as e:
+            stats.record_error()
             traceback.print_exc()
             logger.opt(depth=2).warning(f"Exception: {e}, using default function call")
             return func(*args, **kwargs)
 
+    @functools.wraps(func)
+    async def amemoized_func(*args, **kwargs):
+        func_id = call_id(args, kwargs)
+        if mem_cache is not None:
+            result = memory_get(func_id)
+            if result is not _MISSING:
+                return result
+
+        key = key_prefix + func_id
+        result, hit = await _aload_or_compute(
+            store, key, lambda: func(*args, **kwargs), stats
+        )
+        if hit and verbose:
+            logger.opt(depth=2).info(f"Load from cache: {key}")
+        if mem_cache is not None:
+            mem_cache[func_id] = result
+        return result
+
+    if inspect.iscoroutinefunction(func):
+        memoized_func = amemoized_func
+    memoized_func.cache_store = store
+    memoized_func.cache_key = lambda *args, **kwargs: key_prefix + call_id(args, kwargs)
+    memoized_func.cache_stats = stats
+    if mem_cache is not None:
+        memoized_func.cache_info = mem_cache.cache_info
+        memoized_func.cache_clear = mem_cache.clear
     return memoized_func
 
 
-def imemoize(func: Callable) -> Callable:
-    """Memoize a function into memory."""
+def _cache_or_compute(
+    cache: LRUCache, key: Any, compute: Callable[[], Any], stats: CacheStats
+) -> Any:
+    """Return the in-memory result for `key`, computing and storing it on a miss."""
+    start = time.perf_counter()
+    result = cache.get(key, _MISSING)
+    if result is not _MISSING:
+        stats.record_hit(time.perf_counter() - start, memory=True)
+        return result
+    start = time.perf_counter()
+    result = compute()
+    cache[key] = result
+    stats.record_miss(time.perf_counter() - start)
+    return result
+
+
+async def _acache_or_compute(
+    cache: LRUCache,
+    key: Any,
+    compute: Callable[[], Awaitable],
+    stats: CacheStats,
+    flight_key: Any = None,
+) -> Any:
+    """
+    Async `_cache_or_compute`, sharing one in-flight call per key on a miss.
+
+    `flight_key` replaces `key` for the in-flight table when `key` is only unique
+    within `cache`.
+    """
+    start = time.perf_counter()
+    result = cache.get(key, _MISSING)
+    if result is not _MISSING:
+        stats.record_hit(time.perf_counter() - start, memory=True)
+        return result
+
+    async def compute_and_store():
+        start = time.perf_counter()
+        result = await compute()
+        cache[key] = result
+        stats.record_miss(time.perf_counter() - start)
+        return result
+
+    return await _share_in_flight(
+        key if flight_key is None else flight_key, compute_and_store
+    )
+
+
+def _memory_cache(
+    max_entries: Optional[int], max_bytes: Optional[int], ttl: Optional[float]
+) -> LRUCache:
+    """Return a dedicated cache when limits are given, the shared ICACHE otherwise."""
+    if max_entries is None and max_bytes is None and ttl is None:
+        return ICACHE
+    return LRUCache(max_entries=max_entries, max_bytes=max_bytes, ttl=ttl)
+
+
+def imemoize(
+    func: Optional[Callable] = None,
+    *,
+    max_entries: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+    ttl: Optional[float] = None,
+) -> Callable:
+    """
+    Memoize a function into memory.
+
+    Without limits, results go to the shared, bounded ICACHE. Passing `max_entries`,
+    `max_bytes` or `ttl` gives the function its own LRUCache with those limits:
+
+        @imemoize(max_entries=1000, ttl=600)
+        def f(x): ...
+
+    The wrapper exposes `cache_info()` and `cache_clear()` for its backing cache.
+    """
+    if func is None:
+        return functools.partial(
+            imemoize, max_entries=max_entries, max_bytes=max_bytes, ttl=ttl
+        )
+    plan = _CallKeyPlan(func)
+    cache = _memory_cache(max_entries, max_bytes, ttl)
+    stats = register_stats(func, "imemoize")
 
     @functools.wraps(func)
     def _f(*args, **kwargs):
-        ident_name = identify((inspect.getsource(func), args, kwargs))
-        try:
-            return ICACHE[ident_name]
-        except KeyError:
-            result = func(*args, **kwargs)
-            ICACHE[ident_name] = result
-            return result
+        ident_name = plan.key(args, kwargs)
+        return _cache_or_compute(cache, ident_name, lambda: func(*args, **kwargs), stats)
+
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def _f(*args, **kwargs):
+            ident_name = plan.key(args, kwargs)
+            return await _acache_or_compute(
+                cache, ident_name, lambda: func(*args, **kwargs), stats
+            )
 
+    _f.cache_info = cache.cache_info
+    _f.cache_clear = cache.clear
+    _f.cache_stats = stats
     return _f
 
 
-def imemoize_v2(keys: List[str]) -> Callable:
+def imemoize_v2(
+    keys: List[str],
+    max_entries: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+    ttl: Optional[float] = None,
+) -> Callable:
     """Memoize a function into memory based on specified keys."""
 
     def decorator(func: Callable) -> Callable:
+        plan = _CallKeyPlan(func)
+        cache = _memory_cache(max_entries, max_bytes, ttl)
+        stats = register_stats(func, "imemoize_v2")
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            arg_names = inspect.getfullargspec(func).args
-            args_dict = dict(zip(arg_names, args))
-            all_args = {**args_dict, **kwargs}
+            all_args = plan.bind(args, kwargs)
             key_values = {key: all_args[key] for key in keys if key in all_args}
             if not key_values:
                 return func(*args, **kwargs)
 
             ident_name = identify((func.__name__, tuple(sorted(key_values.items()))))
-            try:
-                return ICACHE[ident_name]
-            except KeyError:
-                result = func(*args, **kwargs)
-                ICACHE[ident_name] = result
-                return result
+            return _cache_or_compute(
+                cache, ident_name, lambda: func(*args, **kwargs), stats
+            )
 
+        @functools.wraps(func)
+        async def awrapper(*args, **kwargs):
+            all_args = plan.bind(args, kwargs)
+            key_values = {key: all_args[key] for key in keys if key in all_args}
+            if not key_values:
+                return await func(*args, **kwargs)
+
+            ident_name = identify((func.__name__, tuple(sorted(key_values.items()))))
+            return await _acache_or_compute(
+                cache, ident_name, lambda: func(*args, **kwargs), stats
+            )
+
+        if inspect.iscoroutinefunction(func):
+            wrapper = awrapper
+        wrapper.cache_info = cache.cache_info
+        wrapper.cache_clear = cache.clear
+        wrapper.cache_stats = stats
         return wrapper
 
     return decorator
 
 
-def memoize_v2(keys: List[str], cache_dir: str = SPEED_CACHE_DIR) -> Callable:
+def memoize_v2(
+    keys: List[str],
+    cache_dir: str = SPEED_CACHE_DIR,
+    backend: Union[str, CacheStore] = CACHE_BACKEND,
+) -> Callable:
     """Decorator to memoize function results based on specific keys."""
 
     def decorator(func: Callable) -> Callable:
-        @functools.wraps(func)
-        def wrapper(*args, **kwargs):
-            args_key_values = {}
-            for i, arg in enumerate(args):
-                arg_name = inspect.getfullargspec(func).args[i]
-                args_key_values[arg_name] = arg
-            args_key_values.update(kwargs)
-
+        plan = _CallKeyPlan(func)
+        store = get_store(backend, cache_dir)
+        key_names = "_".join(keys)
+        stats = register_stats(
+            func, "memoize_v2", store, lambda: f"{func.__name__}_{plan.fingerprint}/"
+        )
+
+        def cache_key(*args, **kwargs) -> Optional[str]:
+            """Store key for a call, or None if none of `keys` is among its arguments."""
+            args_key_values = plan.bind(args, kwargs)
             values = [args_key_values[key] for key in keys if key in args_key_values]
             if not values:
+                return None
+            return f"{func.__name__}_{plan.fingerprint}/{key_names}_{identify(values)}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = cache_key(*args, **kwargs)
+            if key is None:
                 return func(*args, **kwargs)
+            result, _ = _load_or_compute(
+                store, key, lambda: func(*args, **kwargs), stats
+            )
+            return result
 
-            key_id = identify(values)
-            func_source = inspect.getsource(func).replace(" ", "")
-            func_id = identify(func_source)
-            key_names = "_".join(keys)
-            cache_path = osp.join(
-                cache_dir, f"{func.__name__}_{func_id}", f"{key_names}_{key_id}.pkl"
+        @functools.wraps(func)
+        async def awrapper(*args, **kwargs):
+            key = cache_key(*args, **kwargs)
+            if key is None:
+                return await func(*args, **kwargs)
+            result, _ = await _aload_or_compute(
+                store, key, lambda: func(*args, **kwargs), stats
             )
-            if osp.exists(cache_path):
-                return load_json_or_pickle(cache_path)
-            result = func(*args, **kwargs)
-            dump_json_or_pickle(result, cache_path)
             return result
 
+        if inspect.iscoroutinefunction(func):
+            wrapper = awrapper
+        wrapper.cache_store = store
+        wrapper.cache_key = cache_key
+        wrapper.cache_stats = stats
         return wrapper
 
     return decorator
 
 
-def memoize_method(method):
+_KEY_SCALARS = frozenset((str, int, float, bool, bytes, type(None)))
+
+
+def _method_key(args: tuple, kwargs: dict) -> Any:
+    """
+    Cheap key for in-process method caches.
+
+    Builtin scalar arguments are keyed as `(type, value)` pairs, so `1`, `1.0` and
+    `True` stay distinct; anything else falls back to their `identify` digest.
+    """
+    values = (*args, *kwargs.values())
+    if not _KEY_SCALARS.issuperset(map(type, values)):
+        return identify([args, kwargs])
+    key = tuple((type(a), a) for a in args)
+    if kwargs:
+        key += tuple((k, type(v), v) for k, v in sorted(kwargs.items()))
+    return key
+
+
+def memoize_method(
+    method: Optional[Callable] = None,
+    *,
+    max_entries: Optional[int] = None,
+    ttl: Optional[float] = None,
+) -> Callable:
     """
     Decorator function to memoize (cache) results of a class method.
 
-    This decorator caches the output of the wrapped method based on its input arguments
-    (both positional and keyword). If the method is called again with the same arguments,
-    it returns the cached result instead of executing the method again.
+    Each instance gets its own cache, keyed by the method arguments (the values
+    and types of builtin scalars, their `identify` digest otherwise). Caches are
+    held by weak reference to the instance and dropped when it is garbage-collected,
+    and `max_entries`/`ttl` bound each of them as an LRU:
+
+        @memoize_method(max_entries=128)
+        def embed(self, text): ...
+
+    The wrapper exposes `cache_clear(instance=None)` to drop one or every cache.
 
     Args:
         method (Callable): The decorated method whose result will be memoized.
     """
-    cache = {}
+    if method is None:
+        return functools.partial(memoize_method, max_entries=max_entries, ttl=ttl)
+    caches: Dict[int, LRUCache] = {}  # id(instance) -> cache, cleared by finalizers
+    attr = f"__memoize_method_{method.__name__}"
+    lock = threading.Lock()
+    stats = register_stats(method, "memoize_method")
+
+    def instance_cache(obj: Any) -> Optional[LRUCache]:
+        cache = caches.get(id(obj))
+        if cache is not None:
+            return cache
+        with lock:
+            cache = caches.get(id(obj))
+            if cache is None:
+                try:
+                    weakref.finalize(obj, caches.pop, id(obj), None)
+                except TypeError:
+                    # Not weak-referenceable: keep the cache on the instance itself
+                    # so it still dies with it, or skip caching if it has no
+                    # __dict__ either (__slots__ without __weakref__).
+                    state = getattr(obj, "__dict__", None)
+                    if state is None:
+                        return None
+                    return state.setdefault(
+                        attr, LRUCache(max_entries=max_entries, ttl=ttl)
+                    )
+                cache = caches[id(obj)] = LRUCache(max_entries=max_entries, ttl=ttl)
+            return cache
+
+    @functools.wraps(method)
+    def cached_method(self, *args, **kwargs):
+        cache = instance_cache(self)
+        if cache is None:
+            return method(self, *args, **kwargs)
+        return _cache_or_compute(
+            cache,
+            _method_key(args, kwargs),
+            lambda: method(self, *args, **kwargs),
+            stats,
+        )
+
+    if inspect.iscoroutinefunction(method):
+
+        @functools.wraps(method)
+        async def cached_method(self, *args, **kwargs):
+            cache = instance_cache(self)
+            if cache is None:
+                return await method(self, *args, **kwargs)
+            key = _method_key(args, kwargs)
+            return await _acache_or_compute(
+                cache, key, lambda: method(self, *args, **kwargs), stats, (id(cache), key)
+            )
 
-    def cached_method(cls, *args, **kwargs):
-        cache_key = identify([args, kwargs])
-        logger.debug("HIT" if cache_key in cache else "MISS")
-        if cache_key not in cache:
-            cache[cache_key] = method(cls, *args, **kwargs)
-        return cache[cache_key]
+    def cache_clear(instance: Any = None) -> None:
+        if instance is None:
+            with lock:
+                caches.clear()
+        else:
+            caches.pop(id(instance), None)
+            getattr(instance, "__dict__", {}).pop(attr, None)
 
+    cached_method.cache_clear = cache_clear
+    cached_method.cache_stats = stats
     return cached_method
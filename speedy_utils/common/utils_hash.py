@@ -0,0 +1,264 @@
+# utils/utils_hash.py
+
+import pickle
+import struct
+import sys
+from typing import Any, Callable, Dict, Optional
+
+import xxhash
+
+_pack_float = struct.Struct("<d").pack
+_pack_len = struct.Struct("<Q").pack
+
+
+def _update_none(h, x) -> None:
+    h.update(b"N")
+
+
+def _update_bool(h, x) -> None:
+    h.update(b"T" if x else b"F")
+
+
+def _update_int(h, x: int) -> None:
+    data = x.to_bytes((x.bit_length() + 8) // 8, "little", signed=True)
+    h.update(b"i" + _pack_len(len(data)) + data)
+
+
+def _update_float(h, x: float) -> None:
+    h.update(b"f" + _pack_float(x))
+
+
+def _update_str(h, x: str) -> None:
+    data = x.encode("utf-8", "surrogatepass")
+    h.update(b"s" + _pack_len(len(data)))
+    h.update(data)
+
+
+def _update_buffer(h, x) -> None:
+    view = memoryview(x)
+    h.update(b"b" + _pack_len(view.nbytes))
+    h.update(view.cast("B") if view.c_contiguous else view.tobytes())
+
+
+def _is_flat(values) -> bool:
+    """True if every value is a builtin scalar, which pickle encodes exactly."""
+    return _SCALAR_TYPES.issuperset(map(type, values))
+
+
+# Limits of the nested builtin containers hashed through `_plain` with a single
+# pickle instead of a walk: items per container and nesting depth.
+_PLAIN_MAX_ITEMS = 64
+_PLAIN_MAX_DEPTH = 4
+_NOT_PLAIN = object()
+
+
+def _plain(x: Any, depth: int = _PLAIN_MAX_DEPTH) -> Any:
+    """
+    Canonical copy of a small nest of builtin scalars, lists, tuples and dicts, with
+    dict keys sorted so that pickling it is deterministic, or `_NOT_PLAIN`.
+    """
+    cls = type(x)
+    if not depth or len(x) > _PLAIN_MAX_ITEMS:
+        return _NOT_PLAIN
+    if cls is tuple or cls is list:
+        items = []
+        for item in x:
+            if type(item) not in _SCALAR_TYPES:
+                item = _plain(item, depth - 1) if type(item) in _CONTAINERS else _NOT_PLAIN
+                if item is _NOT_PLAIN:
+                    return _NOT_PLAIN
+            items.append(item)
+        return tuple(items) if cls is tuple else items
+    try:
+        pairs = sorted(x.items())
+    except TypeError:
+        return _NOT_PLAIN
+    plain = {}
+    for key, value in pairs:
+        if type(key) not in _SCALAR_TYPES:
+            return _NOT_PLAIN
+        if type(value) not in _SCALAR_TYPES:
+            value = _plain(value, depth - 1) if type(value) in _CONTAINERS else _NOT_PLAIN
+            if value is _NOT_PLAIN:
+                return _NOT_PLAIN
+        plain[key] = value
+    return plain
+
+
+def _plain_pickle(x: Any) -> Optional[bytes]:
+    """Tagged pickle of `_plain(x)` for small builtin nests, else None."""
+    if len(x) > _PLAIN_MAX_ITEMS:
+        return None
+    plain = _plain(x)
+    if plain is _NOT_PLAIN:
+        return None
+    return b"P" + pickle.dumps(plain, protocol=4)
+
+
+def _update_sequence(tag: bytes) -> Callable:
+    def update(h, x) -> None:
+        data = _plain_pickle(x)
+        if data is not None:
+            h.update(data)
+            return
+        if _is_flat(x):
+            # Fast path: a single C-level pickle instead of a Python call per item.
+            _update_pickle(h, x)
+            return
+        h.update(tag + _pack_len(len(x)))
+        for item in x:
+            hash_update(h, item)
+
+    return update
+
+
+def _update_dict(h, x: dict) -> None:
+    h.update(b"d" + _pack_len(len(x)))
+    if _is_flat(x.keys()) and _is_flat(x.values()):
+        try:
+            _update_pickle(h, sorted(x.items()))
+            return
+        except TypeError:
+            pass
+    try:
+        keys = sorted(x)
+    except TypeError:
+        # Keys of mixed or unorderable types: order by their own digests instead.
+        keys = sorted(x, key=fast_hash)
+    for key in keys:
+        hash_update(h, key)
+        hash_update(h, x[key])
+
+
+def _update_set(h, x) -> None:
+    h.update(b"S" + _pack_len(len(x)))
+    for digest in sorted(fast_hash(item) for item in x):
+        h.update(digest.encode())
+
+
+def _update_ndarray(h, x) -> None:
+    if x.dtype.hasobject:
+        _update_pickle(h, x)
+        return
+    # dtype.str is "|V<n>" for every structured dtype: spell out its fields.
+    dtype = x.dtype.str if x.dtype.fields is None else repr(x.dtype.descr)
+    h.update(b"a" + dtype.encode() + repr(x.shape).encode())
+    if not x.flags.c_contiguous:
+        x = x.copy(order="C")
+    # Views over the existing buffer; only strided inputs above are copied.
+    h.update(x.reshape(-1).view("u1"))
+
+
+def _update_pandas(h, x) -> None:
+    import pandas as pd
+
+    if isinstance(x, pd.DataFrame):
+        h.update(b"D" + _pack_len(x.shape[1]))
+        hash_update(h, list(x.columns))
+        _update_pandas(h, x.index)
+        for _, column in x.items():
+            _update_array_like(h, column.to_numpy())
+    elif isinstance(x, pd.Series):
+        h.update(b"R")
+        hash_update(h, x.name)
+        _update_pandas(h, x.index)
+        _update_array_like(h, x.to_numpy())
+    elif isinstance(x, pd.RangeIndex):
+        h.update(b"r")
+        hash_update(h, (x.start, x.stop, x.step, x.name))
+    elif isinstance(x, pd.Index):
+        h.update(b"I")
+        hash_update(h, x.name)
+        _update_array_like(h, x.to_numpy())
+    else:
+        _update_pickle(h, x)
+
+
+def _update_array_like(h, x) -> None:
+    import numpy as np
+
+    if isinstance(x, np.ndarray):
+        _update_ndarray(h, x)
+    else:
+        _update_pickle(h, x)
+
+
+def _update_pydantic(h, x) -> None:
+    cls = type(x)
+    h.update(b"m")
+    _update_str(h, f"{cls.__module__}.{cls.__qualname__}")
+    hash_update(h, x.model_dump())
+
+
+def _update_pickle(h, x) -> None:
+    data = pickle.dumps(x)
+    h.update(b"p" + _pack_len(len(data)))
+    h.update(data)
+
+
+_SCALAR_TYPES = frozenset({type(None), bool, int, float, str})
+_CONTAINERS = frozenset({tuple, list, dict})
+
+_HANDLERS: Dict[type, Callable] = {
+    type(None): _update_none,
+    bool: _update_bool,
+    int: _update_int,
+    float: _update_float,
+    str: _update_str,
+    bytes: _update_buffer,
+    bytearray: _update_buffer,
+    memoryview: _update_buffer,
+    list: _update_sequence(b"l"),
+    tuple: _update_sequence(b"t"),
+    dict: _update_dict,
+    set: _update_set,
+    frozenset: _update_set,
+}
+
+
+def _find_handler(cls: type) -> Callable:
+    """Resolve a handler for types outside the builtin table, by module of origin."""
+    module = cls.__module__.split(".")[0]
+    if module == "numpy" and "numpy" in sys.modules:
+        import numpy as np
+
+        if issubclass(cls, np.ndarray):
+            return _update_ndarray
+    if module == "pandas":
+        return _update_pandas
+    if "pydantic" in sys.modules:
+        from pydantic import BaseModel
+
+        if issubclass(cls, BaseModel):
+            return _update_pydantic
+    return _update_pickle
+
+
+def hash_update(h, x: Any) -> None:
+    """Feed a structural encoding of `x` into the xxhash state `h`."""
+    handler = _HANDLERS.get(type(x))
+    if handler is None:
+        handler = _HANDLERS[type(x)] = _find_handler(type(x))
+    handler(h, x)
+
+
+def fast_hash(x: Any) -> str:
+    """
+    Return a hex digest of `x` without pickling it as a whole.
+
+    Builtin containers are walked structurally (dicts in key order), buffers such
+    as bytes and contiguous NumPy arrays are hashed in place through memoryview,
+    DataFrames are hashed column by column and pydantic models through their
+    fields. Any other type falls back to pickle.
+    """
+    if type(x) is tuple or type(x) is list:
+        # Typical memoize key (fingerprint, args, kwargs): one-shot hash of one pickle.
+        data = _plain_pickle(x)
+        if data is not None:
+            return xxhash.xxh64_hexdigest(data, seed=0)
+    h = xxhash.xxh64(seed=0)
+    hash_update(h, x)
+    return h.hexdigest()
+
+
+__all__ = ["fast_hash", "hash_update"]
@@ -1,84 +1,599 @@
 # utils/utils_io.py
 
+import ctypes
+import functools
+import gzip
+import importlib
+import io
 import json
+import math
+import mmap
 import os
 import os.path as osp
 import pickle
+import struct
+import tempfile
+import time
+from contextlib import contextmanager
 from glob import glob
-from typing import Any, List, Dict, Union
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 from .utils_misc import mkdir_or_exist
 
 
-def dump_jsonl(list_dictionaries: List[Dict], file_name: str = "output.jsonl") -> None:
+@contextmanager
+def atomic_open(fname: str, mode: str = "wb", **kwargs) -> Iterator[IO]:
     """
-    Dumps a list of dictionaries to a file in JSON Lines format.
+    Open a temporary file next to `fname` and rename it into place on success.
+
+    Readers never observe a partially written file, and concurrent writers of the
+    same path simply replace each other's complete output.
+    """
+    dir_name = osp.dirname(osp.abspath(fname))
+    fd, tmp_path = tempfile.mkstemp(
+        dir=dir_name, prefix=f".{osp.basename(fname)}.", suffix=".tmp"
+    )
+    try:
+        os.chmod(tmp_path, 0o644)
+        with os.fdopen(fd, mode, **kwargs) as f:
+            yield f
+        os.replace(tmp_path, fname)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+try:
+    import orjson
+except ImportError:  # optional: stdlib json is used instead
+    orjson = None
+
+_ORJSON_OPTIONS = 0 if orjson is None else orjson.OPT_SERIALIZE_NUMPY
+
+
+def _has_non_finite(obj: Any) -> bool:
+    """Whether `obj` holds a NaN or infinite float, looking into dicts and lists."""
+    if isinstance(obj, float):
+        return not math.isfinite(obj)
+    if isinstance(obj, dict):
+        return any(map(_has_non_finite, obj.values()))
+    if isinstance(obj, (list, tuple)):
+        return any(map(_has_non_finite, obj))
+    return False
+
+
+def _json_line(obj: Any) -> bytes:
+    """
+    Serialize `obj` as one UTF-8 JSON line, with orjson when available.
+
+    orjson writes NaN and infinities as `null`, so objects holding such floats
+    are serialized with `json` instead, which keeps them as `NaN`/`Infinity` like
+    the stdlib writer always did. Only lines containing `null` are checked.
+    """
+    if orjson is not None:
+        try:
+            data = orjson.dumps(obj, option=_ORJSON_OPTIONS | orjson.OPT_APPEND_NEWLINE)
+        except TypeError:  # e.g. non-str keys or large ints: let json decide
+            pass
+        else:
+            if b"null" not in data or not _has_non_finite(obj):
+                return data
+            try:
+                return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+            except TypeError:  # NumPy values only orjson can serialize
+                return data
+    return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def _json_loads(data: bytes) -> Any:
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:  # e.g. NaN/Infinity: let json decide
+            pass
+    return json.loads(data)
+
+
+def iter_jsonl(fname: str, block_size: int = 1 << 20) -> Iterator[Any]:
     """
-    with open(file_name, "w", encoding="utf-8") as file:
+    Lazily yield the records of a JSON Lines file.
+
+    The file is read in blocks of `block_size` bytes and split into lines, so
+    memory stays bounded by the block size and the longest line. Blank lines are
+    skipped. Uses orjson when it is installed. Compressed files (`.jsonl.gz`,
+    `.jsonl.zst`, `.jsonl.lz4`) are decompressed while streaming.
+    """
+    with open_stream(fname) as f:
+        tail = b""
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            lines = (tail + block).split(b"\n")
+            tail = lines.pop()
+            for line in lines:
+                if line.strip():
+                    yield _json_loads(line)
+        if tail.strip():
+            yield _json_loads(tail)
+
+
+class JsonlWriter:
+    """
+    Append records to a JSON Lines file, batching the writes.
+
+    Records are serialized as they come (with orjson when installed) and written
+    every `batch_size` records, or `flush_interval` seconds after the last write
+    when set; `flush()` forces it. Use as a context manager so the final batch is
+    written on exit. A `.gz`/`.zst`/`.lz4` suffix compresses the output as it goes.
+
+        with JsonlWriter("out.jsonl") as writer:
+            for record in records:
+                writer.write(record)
+    """
+
+    def __init__(
+        self,
+        fname: str,
+        mode: str = "a",
+        batch_size: int = 1000,
+        flush_interval: Optional[float] = None,
+    ):
+        if mode not in ("a", "w"):
+            raise ValueError("mode must be 'a' or 'w'")
+        mkdir_or_exist(osp.dirname(osp.abspath(fname)))
+        self.fname = fname
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._raw = open(fname, mode + "b")
+        ext = split_compression(fname)[1]
+        self._file = self._raw if ext is None else _compressed_writer(self._raw, ext, None)
+        self._buffer: List[bytes] = []
+        self._last_flush = time.monotonic()
+
+    def write(self, obj: Any) -> None:
+        self._buffer.append(_json_line(obj))
+        if len(self._buffer) >= self.batch_size or (
+            self.flush_interval is not None
+            and time.monotonic() - self._last_flush >= self.flush_interval
+        ):
+            self.flush()
+
+    def write_many(self, objs: Iterable[Any]) -> None:
+        for obj in objs:
+            self.write(obj)
+
+    def flush(self) -> None:
+        """Write buffered records and flush the file."""
+        if self._buffer:
+            self._file.write(b"".join(self._buffer))
+            self._buffer = []
+        self._file.flush()
+        self._last_flush = time.monotonic()
+
+    def close(self) -> None:
+        if not self._raw.closed:
+            self.flush()
+            if self._file is not self._raw:
+                self._file.close()
+            self._raw.close()
+
+    def __enter__(self) -> "JsonlWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def dump_jsonl(
+    list_dictionaries: Iterable[Dict],
+    file_name: str = "output.jsonl",
+    compression_level: Optional[int] = None,
+) -> None:
+    """
+    Dumps dictionaries to a file in JSON Lines format.
+
+    Any iterable works, so generators are written in constant memory, and names
+    ending in `.gz`, `.zst` or `.lz4` are compressed while streaming.
+    """
+    batch: List[bytes] = []
+    with open_stream(file_name, "wb", compression_level) as file:
         for dictionary in list_dictionaries:
-            file.write(json.dumps(dictionary, ensure_ascii=False) + "\n")
+            batch.append(_json_line(dictionary))
+            if len(batch) >= 1000:
+                file.write(b"".join(batch))
+                batch = []
+        file.write(b"".join(batch))
+
+
+# Default levels of the streaming codecs, by compressed-file suffix.
+COMPRESSION_LEVELS = {".zst": 3, ".lz4": 0, ".gz": 6}
+
+# zstd compression threads: -1 uses every logical CPU, 0 compresses in-line.
+ZSTD_THREADS = int(os.environ.get("AV_ZSTD_THREADS", -1))
+
+# Version 1 stores 64-byte aligned offsets; version 0 files (packed) still load.
+_PKL5_MAGIC = b"SPKL5\x01"
+_PKL5_MAGIC_V0 = b"SPKL5\x00"
+_PKL5_HEADER = struct.Struct("<QQ")
+_PKL5_ALIGN = 64
+
+
+def split_compression(fname: str) -> Tuple[str, Optional[str]]:
+    """Split a compound name such as `data.jsonl.zst` into `("data.jsonl", ".zst")`."""
+    base, ext = osp.splitext(fname)
+    if ext in COMPRESSION_LEVELS:
+        return base, ext
+    return fname, None
+
+
+def _import_codec(ext: str) -> Any:
+    """Import the optional compression module for `ext`."""
+    if ext == ".gz":
+        return gzip
+    module, package = {".zst": ("zstandard",) * 2, ".lz4": ("lz4.frame", "lz4")}[ext]
+    try:
+        return importlib.import_module(module)
+    except ImportError as exc:
+        raise ImportError(f"{ext} files require `pip install {package}`") from exc
+
+
+def _compressed_writer(f: IO, ext: str, level: Optional[int]) -> IO:
+    """Wrap a binary file in a streaming zstd/lz4/gzip compressor."""
+    level = COMPRESSION_LEVELS[ext] if level is None else level
+    codec = _import_codec(ext)
+    if ext == ".zst":
+        compressor = codec.ZstdCompressor(level=level, threads=ZSTD_THREADS)
+        return compressor.stream_writer(f, closefd=False)
+    if ext == ".gz":
+        return gzip.GzipFile(fileobj=f, mode="wb", compresslevel=level)
+    return codec.LZ4FrameFile(f, mode="wb", compression_level=level)
+
+
+def _compressed_reader(f: IO, ext: str) -> IO:
+    """Wrap a binary file in a streaming zstd/lz4/gzip decompressor."""
+    codec = _import_codec(ext)
+    if ext == ".zst":
+        reader = codec.ZstdDecompressor().stream_reader(f, read_across_frames=True)
+        return io.BufferedReader(reader)
+    if ext == ".gz":
+        return gzip.GzipFile(fileobj=f, mode="rb")
+    return codec.LZ4FrameFile(f, mode="rb")
+
+
+@contextmanager
+def open_stream(
+    fname: str, mode: str = "rb", compression_level: Optional[int] = None
+) -> Iterator[IO]:
+    """
+    Open `fname` as a binary stream, (de)compressing on the fly when its name ends
+    with `.gz`, `.zst` or `.lz4`.
+
+    Mode "rb" reads, "wb" writes atomically (see `atomic_open`) and "ab" appends a
+    new compressed frame, which every codec decodes as a continuation.
+    """
+    _, ext = split_compression(fname)
+    with (atomic_open(fname, mode) if mode == "wb" else open(fname, mode)) as f:
+        if ext is None:
+            yield f
+        elif mode == "rb":
+            with _compressed_reader(f, ext) as reader:
+                yield reader
+        else:
+            with _compressed_writer(f, ext, compression_level) as writer:
+                yield writer
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // _PKL5_ALIGN) * _PKL5_ALIGN
+
+
+def _dump_pkl5(obj: Any, f: IO) -> None:
+    """
+    Pickle protocol 5 with out-of-band buffers.
+
+    Layout: magic, (pickle size, buffer count), the (offset, size) of each buffer,
+    then the pickle stream and the raw buffers, each starting on a 64-byte
+    boundary so loaded (or memory-mapped) arrays are aligned. Large contiguous
+    buffers (NumPy arrays, pandas blocks) are written straight from memory instead
+    of being copied into the pickle stream.
+    """
+    views = []
+
+    def keep_out_of_band(buf: pickle.PickleBuffer) -> bool:
+        try:
+            views.append(buf.raw())
+            return False
+        except BufferError:  # non-contiguous: serialize in-band
+            return True
+
+    data = pickle.dumps(obj, protocol=5, buffer_callback=keep_out_of_band)
+    header_size = len(_PKL5_MAGIC) + _PKL5_HEADER.size + 16 * len(views)
+    position = _aligned(header_size) + len(data)
+    table = []
+    for view in views:
+        position = _aligned(position)
+        table += (position, view.nbytes)
+        position += view.nbytes
+    f.write(_PKL5_MAGIC + _PKL5_HEADER.pack(len(data), len(views)))
+    f.write(struct.pack(f"<{len(table)}Q", *table))
+    position = header_size
+    for chunk in (data, *views):
+        f.write(bytes(_aligned(position) - position))
+        f.write(chunk)
+        position = _aligned(position) + memoryview(chunk).nbytes
+
+
+def _read_aligned(f: IO, size: int) -> memoryview:
+    """Read `size` bytes into a buffer whose start is 64-byte aligned."""
+    raw = bytearray(size + _PKL5_ALIGN)
+    address = ctypes.addressof(ctypes.c_char.from_buffer(raw))
+    start = -address % _PKL5_ALIGN
+    view = memoryview(raw)[start : start + size]
+    f.readinto(view)
+    return view
+
+
+def _load_pkl5(fname: str, mmap_mode: Optional[str] = None) -> Any:
+    with open(fname, "rb") as f:
+        if mmap_mode is None:
+            view = _read_aligned(f, osp.getsize(fname))
+        else:
+            access = mmap.ACCESS_READ if mmap_mode == "r" else mmap.ACCESS_COPY
+            view = memoryview(mmap.mmap(f.fileno(), 0, access=access))
+    magic = view[: len(_PKL5_MAGIC)]
+    if magic not in (_PKL5_MAGIC, _PKL5_MAGIC_V0):
+        raise ValueError(f"{fname} is not a pkl5 file")
+    offset = len(_PKL5_MAGIC)
+    data_size, count = _PKL5_HEADER.unpack_from(view, offset)
+    offset += _PKL5_HEADER.size
+    if magic == _PKL5_MAGIC_V0:  # sizes only, everything packed back to back
+        sizes = struct.unpack_from(f"<{count}Q", view, offset)
+        offset += 8 * count
+        table = []
+        position = offset + data_size
+        for size in sizes:
+            table.append((position, size))
+            position += size
+    else:
+        flat = struct.unpack_from(f"<{2 * count}Q", view, offset)
+        table = list(zip(flat[::2], flat[1::2]))
+        offset = _aligned(offset + 16 * count)
+    data = view[offset : offset + data_size]
+    buffers = [view[start : start + size] for start, size in table]
+    return pickle.loads(data, buffers=buffers)
 
 
 def dump_json_or_pickle(
-    obj: Any, fname: str, ensure_ascii: bool = False, indent: int = 4
+    obj: Any,
+    fname: str,
+    ensure_ascii: bool = False,
+    indent: int = 4,
+    compression_level: Optional[int] = None,
 ) -> None:
     """
     Dump an object to a file, supporting both JSON and pickle formats.
+
+    The format is chosen by extension:
+        .json / .jsonl      JSON
+        .pkl                pickle
+        .pkl5               pickle protocol 5 with out-of-band buffers
+        .npy                NumPy array, loadable with `mmap_mode`
+
+    `.json`, `.jsonl` and `.pkl` may carry a `.gz`, `.zst` or `.lz4` suffix (e.g.
+    `data.jsonl.zst`) to be compressed while streaming, at `compression_level`.
+
+    The file is written to a temporary name and renamed into place, so concurrent
+    readers see either the old file or the complete new one.
     """
     mkdir_or_exist(osp.abspath(os.path.dirname(osp.abspath(fname))))
-    if fname.endswith(".json"):
-        with open(fname, "w", encoding="utf-8") as f:
-            json.dump(obj, f, ensure_ascii=ensure_ascii, indent=indent)
-    elif fname.endswith(".jsonl"):
-        dump_jsonl(obj, fname)
-    elif fname.endswith(".pkl"):
-        with open(fname, "wb") as f:
-            pickle.dump(obj, f)
+    base, codec = split_compression(fname)
+    if base.endswith(".json"):
+        with open_stream(fname, "wb", compression_level) as f:
+            text = io.TextIOWrapper(f, encoding="utf-8")
+            json.dump(obj, text, ensure_ascii=ensure_ascii, indent=indent)
+            text.detach()
+    elif base.endswith(".jsonl"):
+        dump_jsonl(obj, fname, compression_level)
+    elif base.endswith(".pkl"):
+        protocol = None if codec is None else pickle.HIGHEST_PROTOCOL
+        with open_stream(fname, "wb", compression_level) as f:
+            pickle.dump(obj, f, protocol=protocol)
+    elif codec is not None:
+        ext = osp.splitext(base)[1]
+        raise NotImplementedError(f"Compressed {ext} files are not supported")
+    elif fname.endswith(".pkl5"):
+        with atomic_open(fname, "wb") as f:
+            _dump_pkl5(obj, f)
+    elif fname.endswith(".npy"):
+        import numpy as np
+
+        if not isinstance(obj, np.ndarray):
+            raise TypeError(f".npy files hold NumPy arrays, got {type(obj)}")
+        with atomic_open(fname, "wb") as f:
+            np.save(f, obj, allow_pickle=False)
     else:
         raise NotImplementedError(f"File type {fname} not supported")
 
 
-def load_json_or_pickle(fname: str) -> Any:
+def load_json_or_pickle(fname: str, mmap_mode: Optional[str] = None) -> Any:
     """
     Load an object from a file, supporting both JSON and pickle formats.
+
+    `mmap_mode` ("r" or "c") maps `.npy` and `.pkl5` files into memory instead of
+    reading them, so large arrays are backed by the page cache rather than copied.
+    Names ending in `.gz`, `.zst` or `.lz4` are decompressed while reading.
     """
-    if fname.endswith(".json") or fname.endswith(".jsonl"):
-        with open(fname, "r", encoding="utf-8") as f:
+    base, codec = split_compression(fname)
+    if base.endswith(".jsonl"):
+        return list(iter_jsonl(fname))
+    elif base.endswith(".json"):
+        with open_stream(fname) as f:
             return json.load(f)
+    elif codec is not None:
+        with open_stream(fname) as f:
+            return pickle.load(f)
+    elif fname.endswith(".npy"):
+        import numpy as np
+
+        return np.load(fname, mmap_mode=mmap_mode, allow_pickle=False)
+    elif fname.endswith(".pkl5"):
+        return _load_pkl5(fname, mmap_mode)
     else:
         with open(fname, "rb") as f:
             return pickle.load(f)
 
 
+SHARDABLE_EXTS = (".jsonl", ".txt", ".csv", ".tsv")
+
+
+def split_byte_ranges(
+    fname: str, num_shards: int, skip_header: bool = False
+) -> List[Tuple[int, int]]:
+    """
+    Split a file into at most `num_shards` newline-aligned `(start, end)` byte ranges.
+
+    Boundaries are placed at even offsets and moved forward to just after the next
+    newline, so every line belongs to exactly one range. With `skip_header`, the
+    first line is left out of every range.
+    """
+    size = osp.getsize(fname)
+    if size == 0:
+        return []
+    with open(fname, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        start = 0
+        if skip_header:
+            newline = mm.find(b"\n")
+            start = size if newline == -1 else newline + 1
+        bounds = [start]
+        for k in range(1, num_shards):
+            pos = start + (size - start) * k // num_shards
+            if pos <= bounds[-1]:
+                continue
+            newline = mm.find(b"\n", pos)
+            if newline == -1 or newline + 1 >= size:
+                break
+            bounds.append(newline + 1)
+        bounds.append(size)
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+def _parse_byte_range(fname: str, start: int, end: int) -> Any:
+    """Parse lines `[start, end)` of `fname`, read through mmap in the worker."""
+    ext = osp.splitext(fname)[1]
+    with open(fname, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        data = mm[start:end]
+        if ext in (".csv", ".tsv"):
+            header = mm[: mm.find(b"\n") + 1]
+    if ext == ".jsonl":
+        return [_json_loads(line) for line in data.split(b"\n") if line.strip()]
+    if ext == ".txt":
+        return data.decode("utf-8").splitlines()
+    import pandas as pd
+
+    sep = "\t" if ext == ".tsv" else ","
+    return pd.read_csv(io.BytesIO(header + data), sep=sep)
+
+
+def iter_sharded(
+    fname: str,
+    workers: int = 16,
+    num_shards: Optional[int] = None,
+    min_shard_bytes: int = 8 << 20,
+) -> Iterator[Any]:
+    """
+    Parse one large `.jsonl`, `.txt`, `.csv` or `.tsv` file on several processes.
+
+    The file is cut into newline-aligned byte ranges (by default 4 per worker, of
+    at least `min_shard_bytes`), each parsed by a worker that reads its range
+    through mmap, so only the shard boundaries and the parsed chunks cross process
+    boundaries. Yields one chunk per range, in file order: a list of records or
+    lines, or a DataFrame for CSV/TSV. CSV fields must not contain newlines.
+    """
+    from speedy_utils import multi_process_imap
+
+    ext = osp.splitext(fname)[1]
+    if ext not in SHARDABLE_EXTS:
+        raise NotImplementedError(f"Sharded loading of {ext} files is not supported")
+    if num_shards is None:
+        num_shards = max(1, min(4 * workers, osp.getsize(fname) // min_shard_bytes))
+    ranges = split_byte_ranges(fname, num_shards, skip_header=ext in (".csv", ".tsv"))
+    yield from multi_process_imap(
+        _parse_byte_range,
+        [(fname, start, end) for start, end in ranges],
+        workers=min(workers, max(1, len(ranges))),
+        verbose=False,
+    )
+
+
+def load_sharded(
+    fname: str,
+    workers: int = 16,
+    num_shards: Optional[int] = None,
+    min_shard_bytes: int = 8 << 20,
+) -> Any:
+    """`iter_sharded` joined into one list of records/lines, or one DataFrame for CSV."""
+    chunks = list(iter_sharded(fname, workers, num_shards, min_shard_bytes))
+    if fname.endswith((".csv", ".tsv")):
+        import pandas as pd
+
+        if not chunks:
+            return pd.read_csv(fname, sep="\t" if fname.endswith(".tsv") else ",")
+        return pd.concat(chunks, ignore_index=True)
+    return [item for chunk in chunks for item in chunk]
+
+
 def load_by_ext(
-    fname: Union[str, List[str]], do_memoize: bool = False
+    fname: Union[str, List[str]],
+    do_memoize: bool = False,
+    mmap_mode: Optional[str] = None,
+    sharded: bool = False,
+    lazy: bool = False,
+    hash_content: bool = False,
 ) -> Any:
     """
     Load data based on file extension.
-    """
-    from .utils_cache import (
-        memoize,
-    )  # Adjust import based on your actual multi_worker module
 
+    `mmap_mode` is forwarded to `load_json_or_pickle` for `.npy` and `.pkl5` files.
+    Compound names such as `data.jsonl.zst` or `table.csv.gz` are decompressed while
+    streaming. With `sharded=True`, a single uncompressed `.jsonl`, `.txt`, `.csv`
+    or `.tsv` file is parsed in parallel byte ranges by `load_sharded`. With `lazy=True`, a path, glob or
+    list of paths is opened as a `LazyDataset` that decodes rows on access instead
+    of loading every file.
+
+    With `do_memoize=True`, the parsed result is cached by `cached_load` and reused
+    until the file's size or mtime change (or its contents, with `hash_content`).
+    """
     from speedy_utils import multi_process  # Ensure multi_worker is correctly referenced
 
+    load_one = functools.partial(
+        load_by_ext, do_memoize=do_memoize, hash_content=hash_content
+    )
     try:
+        if lazy:
+            from .lazy_dataset import LazyDataset
+
+            return LazyDataset(fname)
         if isinstance(fname, str) and "*" in fname:
             paths = glob(fname)
             paths = sorted(paths)
-            return multi_process(load_by_ext, paths, workers=16)
+            return multi_process(load_one, paths, workers=16, desc="load_by_ext")
         elif isinstance(fname, list):
             paths = fname
-            return multi_process(load_by_ext, paths, workers=16)
+            return multi_process(load_one, paths, workers=16, desc="load_by_ext")
 
         def load_csv(path: str, **pd_kwargs) -> Any:
             import pandas as pd
 
-            return pd.read_csv(path, engine="pyarrow", **pd_kwargs)
+            with open_stream(path) as f:
+                return pd.read_csv(f, engine="pyarrow", **pd_kwargs)
 
         def load_txt(path: str) -> List[str]:
-            with open(path, "r", encoding="utf-8") as f:
-                return f.read().splitlines()
+            with open_stream(path) as f:
+                return f.read().decode("utf-8").splitlines()
 
         def load_default(path: str) -> Any:
             if path.endswith(".jsonl") or path.endswith(".json"):
@@ -86,25 +601,35 @@ def load_by_ext(
                     return load_json_or_pickle(path)
                 except json.JSONDecodeError as exc:
                     raise ValueError("JSON decoding failed") from exc
-            return load_json_or_pickle(path)
+            return load_json_or_pickle(path, mmap_mode=mmap_mode)
 
         handlers = {
             ".csv": load_csv,
             ".tsv": load_csv,
             ".txt": load_txt,
             ".pkl": load_default,
+            ".pkl5": load_default,
+            ".npy": load_default,
+            ".zst": load_default,
+            ".lz4": load_default,
+            ".gz": load_default,
             ".json": load_default,
             ".jsonl": load_default,
         }
 
-        ext = os.path.splitext(fname)[-1]
+        base, codec = split_compression(fname)
+        ext = os.path.splitext(base)[-1] or codec
         load_fn = handlers.get(ext)
+        if sharded and codec is None and ext in SHARDABLE_EXTS:
+            load_fn = load_sharded
 
         if not load_fn:
             raise NotImplementedError(f"File type {ext} not supported")
 
         if do_memoize:
-            load_fn = memoize(load_fn)
+            from .load_cache import cached_load
+
+            return cached_load(fname, load_fn, hash_content=hash_content)
 
         return load_fn(fname)
     except Exception as e:
@@ -1,12 +1,204 @@
+import atexit
+import functools
 import inspect
 import os
-from concurrent.futures import ThreadPoolExecutor
+import os.path as osp
+import pickle
+import random
+import time
+import traceback
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
 from multiprocessing import Pool
-from typing import Any, Callable, List
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 import asyncio
 from loguru import logger
 from tqdm import tqdm
 
+from .common.executor_stats import ExecutorStats, _Timed, resolve_stats
+from .common.rate_limit import RateLimiter
+from .common.shared_array import resolve, share
+from .common.utils_hash import fast_hash
+
+
+def _default_desc(func: Callable) -> str:
+    try:
+        source_file = inspect.getsourcefile(func) or "<string>"
+        source_line = inspect.getsourcelines(func)[1]
+        file_line = f"{source_file}:{source_line}"
+    except (TypeError, OSError):
+        file_line = "Unknown location"
+    return f"{func.__name__} at {file_line}"
+
+
+class ItemError:
+    """
+    Failure of one input, left in its slot of the results with `on_error="return"`.
+
+    Holds the exception, its formatted traceback, the index of the input and the
+    number of attempts made. `raise item_error.exception` re-raises the original.
+    """
+
+    __slots__ = ("exception", "traceback", "attempts", "index")
+
+    def __init__(self, exception: BaseException, traceback: str, attempts: int):
+        self.exception = exception
+        self.traceback = traceback
+        self.attempts = attempts
+        self.index: Optional[int] = None
+
+    def __getstate__(self):
+        return (self.exception, self.traceback, self.attempts, self.index)
+
+    def __setstate__(self, state):
+        self.exception, self.traceback, self.attempts, self.index = state
+
+    def __repr__(self) -> str:
+        return (
+            f"ItemError(index={self.index}, exception={self.exception!r}, "
+            f"attempts={self.attempts})"
+        )
+
+
+def _capture_errors(on_error: str) -> bool:
+    """Whether failed items are returned as `ItemError`s rather than raised."""
+    if on_error not in ("raise", "return"):
+        raise ValueError(f'on_error must be "raise" or "return", got {on_error!r}')
+    return on_error == "return"
+
+
+class _Retrying:
+    """
+    Picklable wrapper calling `func` with retries on `retry_on` exceptions.
+
+    Waits `backoff * 2**n` seconds (with jitter) before retry n. When `capture` is
+    set, the final failure is returned as an ItemError instead of raised.
+    """
+
+    def __init__(self, func, retries, retry_on, backoff, capture, portable=False):
+        self.func = func
+        self.retries = retries
+        self.retry_on = retry_on
+        self.backoff = backoff
+        self.capture = capture
+        # Errors crossing a process boundary must survive pickling.
+        self.portable = portable
+
+    def __call__(self, *args, **kwargs):
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return self.func(*args, **kwargs)
+            except Exception as exc:
+                if attempt <= self.retries and isinstance(exc, self.retry_on):
+                    delay = self.backoff * 2 ** (attempt - 1)
+                    time.sleep(delay * random.uniform(0.5, 1.0))
+                    continue
+                if not self.capture:
+                    raise
+                if self.portable:
+                    try:
+                        pickle.dumps(exc)
+                    except Exception:
+                        exc = RuntimeError(repr(exc))
+                return ItemError(exc, traceback.format_exc(), attempt)
+
+
+class _Journal:
+    """
+    Append-only pickle log of `(index, input digest, result)` for finished items.
+
+    Reopening the same path replays the log, so a killed run can skip the items
+    it already finished. A record cut short by the crash is dropped. With no path
+    this does nothing.
+    """
+
+    def __init__(self, path: Optional[str], inputs: List[Any]):
+        self.path = path
+        self.done: Dict[int, Any] = {}
+        self.digests: List[str] = []
+        self._file = None
+        if path is None:
+            return
+        self.digests = [fast_hash(item) for item in inputs]
+        if osp.exists(path):
+            self._replay()
+        self._file = open(path, "ab")
+
+    def _replay(self) -> None:
+        end = 0
+        with open(self.path, "rb") as f:
+            while True:
+                try:
+                    index, digest, result = pickle.load(f)
+                except EOFError:
+                    break
+                except Exception:
+                    logger.warning("Dropping truncated record in {}", self.path)
+                    break
+                if index < len(self.digests) and self.digests[index] == digest:
+                    self.done[index] = result
+                end = f.tell()
+        os.truncate(self.path, end)
+
+    def append(self, index: int, result: Any) -> None:
+        if self._file is not None:
+            pickle.dump((index, self.digests[index], result), self._file)
+            self._file.flush()
+
+    def __enter__(self) -> "_Journal":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self._file is not None:
+            self._file.close()
+
+
+def _record(
+    index: int,
+    output: Any,
+    results: List[Any],
+    journal: _Journal,
+    tag: str,
+    stats: Optional[ExecutorStats] = None,
+) -> None:
+    """Store one output in its slot, journaling successes and logging failures."""
+    if stats is not None:
+        output = stats.add(index, output)
+    results[index] = output
+    if isinstance(output, ItemError):
+        output.index = index
+        logger.opt(depth=2).error(
+            "[{}] Error in item {}: {!r}", tag, index, output.exception
+        )
+    else:
+        journal.append(index, output)
+
+
+def _report_stats(stats: Optional[ExecutorStats], desc: str, depth: int = 2) -> None:
+    if stats is not None:
+        stats.finish()
+        logger.opt(depth=depth).info("Executor stats {}\n{}", desc, stats.report())
+
 
 def multi_thread(
     func: Callable,
@@ -14,38 +206,193 @@ def multi_thread(
     workers: int = 4,
     verbose: bool = True,
     desc: str | None = None,
+    retries: int = 0,
+    retry_on: Tuple[type, ...] = (Exception,),
+    backoff: float = 1.0,
+    on_error: str = "raise",
+    checkpoint: Optional[str] = None,
+    limiter: Optional[RateLimiter] = None,
+    stats: Union[bool, ExecutorStats] = False,
 ) -> List[Any]:
+    """
+    Apply `func` to each input in a thread pool, returning results in input order.
+
+    Failing items are retried up to `retries` times when the exception is one of
+    `retry_on`, with exponential `backoff` seconds between attempts. With
+    `on_error="return"`, an item that still fails leaves an `ItemError` in its
+    slot instead of aborting the run.
+
+    `checkpoint` is a journal path: finished items are appended to it as they
+    complete, and a rerun with the same path and inputs only runs the rest.
+
+    `limiter` (a `RateLimiter`) applies request/token rate limits to every
+    attempt and shrinks the number of concurrent calls on throttling errors;
+    `workers` caps its window.
+
+    `stats=True` (or an `ExecutorStats` to fill) times every item and logs a
+    report of latency percentiles, queue wait, per-worker busy/idle time and the
+    slowest inputs at the end.
+    """
     if desc is None:
-        fn_name = func.__name__
-        try:
-            source_file = inspect.getsourcefile(func) or "<string>"
-            source_line = inspect.getsourcelines(func)[1]
-            file_line = f"{source_file}:{source_line}"
-        except (TypeError, OSError):
-            file_line = "Unknown location"
-        desc = f"{fn_name} at {file_line}"
-
-    with ThreadPoolExecutor(max_workers=workers) as executor:
+        desc = _default_desc(func)
+    if limiter is not None:
+        func = functools.partial(limiter.call, func)
+    call = _Retrying(func, retries, retry_on, backoff, _capture_errors(on_error))
+    stats = resolve_stats(stats)
+    if stats is not None:
+        call = _Timed(call)
+        stats.start()
+
+    results: List[Any] = [None] * len(inputs)
+    with _Journal(checkpoint, inputs) as journal, ThreadPoolExecutor(
+        max_workers=workers
+    ) as executor:
+        for index, result in journal.done.items():
+            results[index] = result
+        todo = [i for i in range(len(inputs)) if i not in journal.done]
         # Use executor.map to apply func to inputs in order
-        map_func = executor.map(func, inputs)
-        if verbose:
-            results = list(tqdm(map_func, total=len(inputs), desc=desc))
-        else:
-            results = list(map_func)
+        outputs = executor.map(call, (inputs[i] for i in todo))
+        pbar = tqdm(
+            outputs,
+            total=len(inputs),
+            initial=len(journal.done),
+            desc=desc,
+            disable=not verbose,
+        )
+        for index, output in zip(todo, pbar):
+            _record(index, output, results, journal, "multithread", stats)
+    _report_stats(stats, desc)
     return results
 
 
-def _init_pool_processes(func):
+def _init_pool_processes(func, shared=None):
     global _func
+    if shared:
+        # Attach the broadcast arrays once per worker, as zero-copy views.
+        func = functools.partial(func, **{k: resolve(v) for k, v in shared.items()})
     _func = func
 
 
 def _pool_process_executor(args):
     # Unpack arguments if necessary
     if isinstance(args, tuple):
-        return _func(*args)
+        return _func(*map(resolve, args))
     else:
-        return _func(args)
+        return _func(resolve(args))
+
+
+@contextmanager
+def _shared_constants(shared: Optional[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Move `shared` values into shared memory, releasing them on exit."""
+    handles = {key: share(value) for key, value in (shared or {}).items()}
+    try:
+        yield handles
+    finally:
+        for key, handle in handles.items():
+            if handle is not shared[key]:
+                handle.unlink()
+
+
+def _pool_process_executor_single(arg):
+    return _func(arg)
+
+
+def _pool_call(task):
+    # Task of a WorkerPool: the function travels with its arguments.
+    call, args = task
+    if isinstance(args, tuple):
+        return call(*map(resolve, args))
+    return call(resolve(args))
+
+
+def _pool_timed(task):
+    executor, args = task
+    start = time.perf_counter()
+    result = executor(args)
+    return result, time.perf_counter() - start
+
+
+# Aim for chunks that take this long to run, so that pickling and the pipe
+# round-trip of a chunk stay small next to the work it carries.
+CHUNK_TARGET_SECONDS = 0.05
+
+
+def auto_chunksize(
+    num_items: int,
+    workers: int,
+    item_time: float,
+    target: float = CHUNK_TARGET_SECONDS,
+) -> int:
+    """
+    Chunk size for `num_items` tasks taking about `item_time` seconds each.
+
+    Chunks grow until one takes roughly `target` seconds, but stay small enough to
+    give every worker at least 4 chunks so the tail of the run stays balanced.
+    """
+    by_time = int(target / max(item_time, 1e-7))
+    by_balance = -(-num_items // (4 * workers))
+    return max(1, min(by_time, by_balance))
+
+
+def _map_on_pool(
+    pool: Any,
+    executor: Callable,
+    make_task: Callable,
+    inputs: List[Any],
+    workers: int,
+    verbose: bool,
+    desc: str,
+    chunksize: Optional[int],
+    on_error: str,
+    checkpoint: Optional[str],
+    stats: Optional[ExecutorStats] = None,
+) -> List[Any]:
+    """
+    Run `executor(make_task(item))` for every unfinished input on `pool`.
+
+    Shared by `multi_process` and `WorkerPool.map`: resumes from the checkpoint
+    journal, probes the per-item time to pick a chunk size, and records each
+    output in its slot.
+    """
+    results: List[Any] = [None] * len(inputs)
+    with _Journal(checkpoint, inputs) as journal, tqdm(
+        total=len(inputs), initial=len(journal.done), desc=desc, disable=not verbose
+    ) as pbar:
+        for index, result in journal.done.items():
+            results[index] = result
+        todo = [i for i in range(len(inputs)) if i not in journal.done]
+        try:
+            if chunksize is None:
+                probe, todo = todo[:workers], todo[workers:]
+                item_times = []
+                tasks = [(executor, make_task(inputs[i])) for i in probe]
+                for index, (result, elapsed) in zip(probe, pool.imap(_pool_timed, tasks)):
+                    _record(index, result, results, journal, "multiprocess", stats)
+                    item_times.append(elapsed)
+                    pbar.update(1)
+                item_time = sorted(item_times)[len(item_times) // 2] if item_times else 0
+                chunksize = auto_chunksize(len(todo), workers, item_time)
+                logger.opt(depth=2).debug(
+                    "Multi-processing {} | {:.2e}s/item -> chunksize {}",
+                    desc,
+                    item_time,
+                    chunksize,
+                )
+            tasks = (make_task(inputs[i]) for i in todo)
+            outputs = pool.imap(executor, tasks, chunksize=chunksize)
+            for index, result in zip(todo, outputs):
+                _record(index, result, results, journal, "multiprocess", stats)
+                pbar.update(1)
+        except Exception as e:
+            if on_error == "raise":
+                raise
+            logger.opt(depth=2).error(f"[multiprocess] Error {e}")
+    _report_stats(stats, desc, depth=3)
+    return results
+
+
+def _identity(x):
+    return x
 
 
 def multi_process(
@@ -54,16 +401,55 @@ def multi_process(
     workers: int = 16,
     verbose: bool = True,
     desc: str = "",
+    chunksize: Optional[int] = None,
+    shared: Optional[Dict[str, Any]] = None,
+    retries: int = 0,
+    retry_on: Tuple[type, ...] = (Exception,),
+    backoff: float = 1.0,
+    on_error: str = "return",
+    checkpoint: Optional[str] = None,
+    pool: Optional["WorkerPool"] = None,
+    stats: Union[bool, ExecutorStats] = False,
 ) -> List[Any]:
+    """
+    Apply `func` to each input in a process pool, unpacking tuple inputs.
+
+    Items are dispatched in chunks of `chunksize`. By default the first `workers`
+    items are run one by one to measure the per-item time, and the chunk size for
+    the rest is picked by `auto_chunksize`. Progress is still reported per item.
+
+    `shared` holds constants passed to every call as keyword arguments. NumPy
+    arrays and DataFrames among them are copied once into shared memory and each
+    worker gets zero-copy views, instead of one copy per worker. Inputs may also
+    be handles from `share()`, which are resolved to views before the call.
+
+    `retries`, `retry_on`, `backoff` and `checkpoint` work as in `multi_thread`.
+    Failed items are logged and left as an `ItemError` in their slot, so results
+    always line up with inputs; pass `on_error="raise"` to stop at the first one.
+
+    With `pool`, the work runs on that long-lived `WorkerPool` instead of a fresh
+    pool (`workers` is then ignored). `stats` works as in `multi_thread`.
+    """
     if not desc:
-        fn_name = func.__name__
-        try:
-            source_file = inspect.getsourcefile(func) or "<string>"
-            source_line = inspect.getsourcelines(func)[1]
-            file_line = f"{source_file}:{source_line}"
-        except (TypeError, OSError):
-            file_line = "Unknown location"
-        desc = f"{fn_name} at {file_line}"
+        desc = _default_desc(func)
+    if pool is not None:
+        if shared:
+            raise ValueError(
+                "shared constants need a dedicated pool, pass share() handles as inputs"
+            )
+        return pool.map(
+            func,
+            inputs,
+            verbose=verbose,
+            desc=desc,
+            chunksize=chunksize,
+            retries=retries,
+            retry_on=retry_on,
+            backoff=backoff,
+            on_error=on_error,
+            checkpoint=checkpoint,
+            stats=stats,
+        )
 
     if os.environ.get("DEBUG", "0") == "1":
         logger.opt(depth=2).info("DEBUGGING set num workers to 1")
@@ -71,51 +457,587 @@ def multi_process(
 
     logger.opt(depth=2).info("Multi-processing {} | Num samples: {}", desc, len(inputs))
 
-    results = []
-    with Pool(
-        processes=workers, initializer=_init_pool_processes, initargs=(func,)
-    ) as pool:
+    call = _Retrying(
+        func, retries, retry_on, backoff, _capture_errors(on_error), portable=True
+    )
+    stats = resolve_stats(stats)
+    if stats is not None:
+        call = _Timed(call)
+        stats.start()
+    with _shared_constants(shared) as handles, Pool(
+        processes=workers, initializer=_init_pool_processes, initargs=(call, handles)
+    ) as process_pool:
+        return _map_on_pool(
+            process_pool,
+            _pool_process_executor,
+            _identity,
+            inputs,
+            workers,
+            verbose,
+            desc,
+            chunksize,
+            on_error,
+            checkpoint,
+            stats,
+        )
+
+
+class WorkerPool:
+    """
+    Long-lived process pool that serves successive `map` calls.
+
+    Workers start once, run `initializer(*initargs)` to warm up (imports, model
+    loading) and are reused by every `map`, each of which may use a different
+    function. With `maxtasksperchild`, a worker is replaced after that many tasks
+    (chunks) to contain memory leaks.
+
+    Functions are sent to workers with each chunk, so they must be picklable
+    (defined at module level), unlike `multi_process` which forks with them.
+
+    Usage:
+        with WorkerPool(workers=16, initializer=load_model) as pool:
+            for batch in batches:
+                results = pool.map(predict, batch)
+    """
+
+    def __init__(
+        self,
+        workers: int = 16,
+        initializer: Optional[Callable] = None,
+        initargs: tuple = (),
+        maxtasksperchild: Optional[int] = None,
+    ):
+        if os.environ.get("DEBUG", "0") == "1":
+            logger.opt(depth=1).info("DEBUGGING set num workers to 1")
+            workers = 1
+        self.workers = workers
+        self._pool = Pool(
+            processes=workers,
+            initializer=initializer,
+            initargs=initargs,
+            maxtasksperchild=maxtasksperchild,
+        )
+
+    def map(
+        self,
+        func: Callable,
+        inputs: List[Any],
+        verbose: bool = True,
+        desc: str = "",
+        chunksize: Optional[int] = None,
+        retries: int = 0,
+        retry_on: Tuple[type, ...] = (Exception,),
+        backoff: float = 1.0,
+        on_error: str = "return",
+        checkpoint: Optional[str] = None,
+        stats: Union[bool, ExecutorStats] = False,
+    ) -> List[Any]:
+        """Same as `multi_process(func, inputs, ...)`, on this pool's workers."""
+        if not desc:
+            desc = _default_desc(func)
+        call = _Retrying(
+            func, retries, retry_on, backoff, _capture_errors(on_error), portable=True
+        )
+        stats = resolve_stats(stats)
+        if stats is not None:
+            call = _Timed(call)
+            stats.start()
+        return _map_on_pool(
+            self._pool,
+            _pool_call,
+            functools.partial(_pair, call),
+            inputs,
+            self.workers,
+            verbose,
+            desc,
+            chunksize,
+            on_error,
+            checkpoint,
+            stats,
+        )
+
+    def close(self) -> None:
+        """Let the workers finish and stop them."""
+        self._pool.close()
+        self._pool.join()
+
+    def terminate(self) -> None:
+        """Stop the workers immediately."""
+        self._pool.terminate()
+        self._pool.join()
+
+    def __enter__(self) -> "WorkerPool":
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.terminate()
+
+
+def _pair(call, args):
+    return call, args
+
+
+_POOLS: Dict[str, WorkerPool] = {}
+
+
+def get_pool(name: str = "default", **kwargs) -> WorkerPool:
+    """
+    Return the registered pool `name`, creating it with `WorkerPool(**kwargs)`.
+
+    Later calls return the same pool whatever their arguments, until
+    `close_pools()`. Registered pools are closed at interpreter exit.
+    """
+    pool = _POOLS.get(name)
+    if pool is None:
+        pool = _POOLS[name] = WorkerPool(**kwargs)
+    return pool
+
+
+def close_pools() -> None:
+    """Close every pool created by `get_pool`."""
+    while _POOLS:
+        _, pool = _POOLS.popitem()
+        pool.close()
+
+
+atexit.register(close_pools)
+
+
+def _init_hybrid_worker(func, threads):
+    global _func, _threads
+    _func = func
+    _threads = ThreadPoolExecutor(max_workers=threads)
+
+
+def _hybrid_chunk(chunk):
+    # Runs in a worker process: fan the chunk out over its thread pool.
+    return list(_threads.map(_pool_process_executor, chunk))
+
+
+def multi_hybrid(
+    func: Callable,
+    inputs: List[Any],
+    processes: Optional[int] = None,
+    threads: int = 8,
+    verbose: bool = True,
+    desc: str = "",
+    chunksize: Optional[int] = None,
+    retries: int = 0,
+    retry_on: Tuple[type, ...] = (Exception,),
+    backoff: float = 1.0,
+    on_error: str = "return",
+    stats: Union[bool, ExecutorStats] = False,
+) -> List[Any]:
+    """
+    Run `func` on `processes` worker processes with `threads` threads each.
+
+    For pipelines mixing CPU work with blocking I/O (parse, then call an API):
+    processes use every core while `processes * threads` calls can wait on I/O at
+    once. Inputs are sent in chunks of `chunksize` (by default enough to keep each
+    thread pool busy and give every process several chunks), results come back in
+    input order and the progress bar advances per chunk. Tuple inputs are
+    unpacked, and errors and `stats` are handled as in `multi_process`.
+    """
+    if not desc:
+        desc = _default_desc(func)
+    processes = processes or os.cpu_count() or 1
+    if os.environ.get("DEBUG", "0") == "1":
+        logger.opt(depth=2).info("DEBUGGING set num workers to 1")
+        processes = 1
+    if chunksize is None:
+        chunksize = min(16 * threads, max(threads, -(-len(inputs) // (4 * processes))))
+    logger.opt(depth=2).info(
+        "Multi-hybrid {} | Num samples: {} | {} processes x {} threads",
+        desc,
+        len(inputs),
+        processes,
+        threads,
+    )
+
+    call = _Retrying(
+        func, retries, retry_on, backoff, _capture_errors(on_error), portable=True
+    )
+    stats = resolve_stats(stats)
+    if stats is not None:
+        call = _Timed(call)
+        stats.start()
+    chunks = (inputs[i : i + chunksize] for i in range(0, len(inputs), chunksize))
+    results: List[Any] = [None] * len(inputs)
+    with _Journal(None, inputs) as journal, Pool(
+        processes=processes,
+        initializer=_init_hybrid_worker,
+        initargs=(call, threads),
+    ) as pool, tqdm(total=len(inputs), desc=desc, disable=not verbose) as pbar:
+        for start, outputs in zip(
+            range(0, len(inputs), chunksize), pool.imap(_hybrid_chunk, chunks)
+        ):
+            for index, output in enumerate(outputs, start):
+                _record(index, output, results, journal, "multihybrid", stats)
+            pbar.update(len(outputs))
+    _report_stats(stats, desc)
+    return results
+
+
+def _imap_bounded(
+    executor: Executor,
+    func: Callable,
+    inputs: Iterable[Any],
+    ordered: bool,
+    max_in_flight: int,
+    pbar: tqdm,
+) -> Iterator[Any]:
+    """
+    Submit `func(item)` for each input while keeping at most `max_in_flight` pending.
+
+    Inputs are pulled lazily, so only the window of in-flight items and their
+    results are held in memory. Yields results in input order, or `(index, result)`
+    pairs as they complete when `ordered` is False.
+    """
+    items = enumerate(inputs)
+    with executor, pbar:
         try:
-            if verbose:
-                for result in tqdm(
-                    pool.imap(_pool_process_executor, inputs),
-                    total=len(inputs),
-                    desc=desc,
-                ):
-                    results.append(result)
+            if ordered:
+                window: deque = deque()
+                for idx, item in items:
+                    window.append(executor.submit(func, item))
+                    if len(window) >= max_in_flight:
+                        yield window.popleft().result()
+                        pbar.update(1)
+                while window:
+                    yield window.popleft().result()
+                    pbar.update(1)
             else:
-                results = pool.map(_pool_process_executor, inputs)
-        except Exception as e:
-            logger.opt(depth=2).error(f"[multiprocess] Error {e}")
+                pending: Dict[Any, int] = {}
+                exhausted = False
+                while pending or not exhausted:
+                    while not exhausted and len(pending) < max_in_flight:
+                        try:
+                            idx, item = next(items)
+                        except StopIteration:
+                            exhausted = True
+                            break
+                        pending[executor.submit(func, item)] = idx
+                    if not pending:
+                        break
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield pending.pop(future), future.result()
+                        pbar.update(1)
+        finally:
+            # Stop queued work when the consumer stops early or an item fails.
+            executor.shutdown(wait=True, cancel_futures=True)
 
-    return results
 
+def multi_thread_imap(
+    func: Callable,
+    inputs: Iterable[Any],
+    workers: int = 4,
+    ordered: bool = True,
+    max_in_flight: Optional[int] = None,
+    verbose: bool = True,
+    desc: str | None = None,
+    total: Optional[int] = None,
+) -> Iterator[Any]:
+    """
+    Streaming `multi_thread`: accepts any iterable and yields results as they finish.
+
+    At most `max_in_flight` items (default `2 * workers`) are submitted but not yet
+    consumed, so generators of any length run in constant memory. With
+    `ordered=False` results come as `(index, result)` pairs in completion order.
+    The progress bar uses `total`, or `len(inputs)` when available.
 
-async def async_multi_thread(f, inputs, desc="", user_tqdm=True):
+    Usage:
+        with open("big.jsonl") as f:
+            for result in multi_thread_imap(process_line, f, workers=32):
+                ...
     """
-    Uasge:
-        inputs = list(range(10))
-        def function(i):
-            time.sleep(1)
-            return 1/i
-        results = await amulti_thread(function, inputs)
+    if desc is None:
+        desc = _default_desc(func)
+    if total is None and hasattr(inputs, "__len__"):
+        total = len(inputs)
+    pbar = tqdm(total=total, desc=desc, disable=not verbose)
+    yield from _imap_bounded(
+        ThreadPoolExecutor(max_workers=workers),
+        func,
+        inputs,
+        ordered,
+        max_in_flight or 2 * workers,
+        pbar,
+    )
+
+
+def multi_process_imap(
+    func: Callable,
+    inputs: Iterable[Any],
+    workers: int = 16,
+    ordered: bool = True,
+    max_in_flight: Optional[int] = None,
+    verbose: bool = True,
+    desc: str = "",
+    total: Optional[int] = None,
+    shared: Optional[Dict[str, Any]] = None,
+) -> Iterator[Any]:
+    """
+    Streaming `multi_process`, with the same arguments and output as `multi_thread_imap`.
+
+    Tuple inputs are unpacked into positional arguments and `shared` constants are
+    broadcast through shared memory, as in `multi_process`.
+    Unlike `Pool.imap`, which drains the whole input iterable into its task queue,
+    inputs are only read as in-flight slots free up.
+    """
+    if not desc:
+        desc = _default_desc(func)
+    if os.environ.get("DEBUG", "0") == "1":
+        logger.opt(depth=2).info("DEBUGGING set num workers to 1")
+        workers = 1
+    if total is None and hasattr(inputs, "__len__"):
+        total = len(inputs)
+    pbar = tqdm(total=total, desc=desc, disable=not verbose)
+    with _shared_constants(shared) as handles:
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_pool_processes,
+            initargs=(func, handles),
+        )
+        yield from _imap_bounded(
+            executor,
+            _pool_process_executor,
+            inputs,
+            ordered,
+            max_in_flight or 2 * workers,
+            pbar,
+        )
+
+
+def cached_map(
+    func: Callable,
+    inputs: List[Any],
+    workers: int = 4,
+    use_process: bool = False,
+    batch_size: int = 1000,
+    verbose: bool = True,
+    desc: str = "",
+) -> Tuple[List[Any], Dict[str, int]]:
     """
+    Map a `memoize`/`memoize_v2` decorated function over inputs, computing only misses.
 
-    def ensure_output_idx(idx_i):
-        idx, i = idx_i
-        return idx, f(i)
+    All cache keys are computed up front and looked up in batches against the
+    function's cache store. Only the missing items (deduplicated by key) are sent to
+    a thread pool, or a process pool with `use_process=True`, and their results are
+    written back with one `put_many` per `batch_size` items. Each input is passed as
+    the single argument of `func`, as in `multi_thread`.
 
-    tasks = [asyncio.to_thread(ensure_output_idx, i) for i in enumerate(inputs)]
+    Returns the results in input order and a dict with `hits` and `misses` counts.
+    A function without a cache store (e.g. memoize disabled by AV_MEMOIZE_DISABLE=1)
+    is simply mapped over every input, all counted as misses.
+
+    Usage:
+        results, counts = cached_map(memoized_fn, inputs, workers=32)
+    """
+    if inspect.iscoroutinefunction(func):
+        raise ValueError("cached_map expects a sync function decorated with memoize")
+    store = getattr(func, "cache_store", None)
+    if store is None:
+        if use_process:
+            results = multi_process(
+                func, inputs, workers=workers, verbose=verbose, desc=desc, on_error="raise"
+            )
+        else:
+            results = multi_thread(
+                func, inputs, workers=workers, verbose=verbose, desc=desc or None
+            )
+        return results, {"hits": 0, "misses": len(inputs)}
+    raw_func = func.__wrapped__
+    if not desc:
+        desc = func.__name__
+
+    stats = func.cache_stats
+    lookup_start = time.perf_counter()
+    keys = [func.cache_key(item) for item in inputs]
+    results: List[Any] = [None] * len(inputs)
+    # Positions waiting for each missing key; uncacheable items (key None) run alone.
+    pending: Dict[Any, List[int]] = {}
+    for start in range(0, len(keys), batch_size):
+        batch_keys = keys[start : start + batch_size]
+        found = store.get_many(key for key in batch_keys if key is not None)
+        for i, key in enumerate(batch_keys, start):
+            if key in found:
+                results[i] = found[key]
+            else:
+                pending.setdefault(key if key is not None else (None, i), []).append(i)
+
+    miss_count = sum(len(positions) for positions in pending.values())
+    counts = {"hits": len(inputs) - miss_count, "misses": miss_count}
+    stats.record_hit(time.perf_counter() - lookup_start, count=counts["hits"])
+    logger.opt(depth=1).info(
+        "cached_map {} | hits: {} | misses: {}", desc, counts["hits"], miss_count
+    )
+    if not pending:
+        return results, counts
+
+    compute_start = time.perf_counter()
+    miss_keys = list(pending)
+    miss_inputs = [inputs[pending[key][0]] for key in miss_keys]
+    if use_process:
+        pool = Pool(
+            processes=workers, initializer=_init_pool_processes, initargs=(raw_func,)
+        )
+        outputs = pool.imap(_pool_process_executor_single, miss_inputs)
+    else:
+        pool = ThreadPoolExecutor(max_workers=workers)
+        outputs = pool.map(raw_func, miss_inputs)
+
+    to_store: List[Tuple[str, Any]] = []
+    with pool:
+        for key, output in tqdm(
+            zip(miss_keys, outputs), total=len(miss_keys), desc=desc, disable=not verbose
+        ):
+            for i in pending[key]:
+                results[i] = output
+            if isinstance(key, str):
+                to_store.append((key, output))
+            if len(to_store) >= batch_size:
+                store.put_many(to_store)
+                to_store = []
+    store.put_many(to_store)
+    stats.record_miss(time.perf_counter() - compute_start, count=miss_count)
+    return results, counts
+
+
+async def _aenumerate(inputs: Any) -> AsyncIterator[Tuple[int, Any]]:
+    """Enumerate a sync or async iterable, pulling one item at a time."""
+    if hasattr(inputs, "__aiter__"):
+        idx = 0
+        async for item in inputs:
+            yield idx, item
+            idx += 1
+    else:
+        for item in enumerate(inputs):
+            yield item
+
+
+async def async_multi_thread_imap(
+    f: Callable,
+    inputs: Any,
+    max_concurrency: int = 32,
+    desc: str = "",
+    user_tqdm: bool = True,
+    total: Optional[int] = None,
+    limiter: Optional[RateLimiter] = None,
+) -> AsyncIterator[Tuple[int, Any]]:
+    """
+    Async map yielding `(index, result)` pairs in completion order.
+
+    Coroutine functions are awaited directly; plain functions run on a dedicated
+    pool of `max_concurrency` threads. Inputs may be a sync or async iterable and
+    are only pulled as slots free up, so at most `max_concurrency` tasks exist at
+    any time regardless of the input size.
+
+    With a `limiter`, calls wait for its rate limits and the number of tasks in
+    flight follows its adaptive window (capped by `max_concurrency`).
+
+    Usage:
+        async for idx, reply in async_multi_thread_imap(call_llm, prompts, 64):
+            ...
+    """
     if not desc:
         desc = f"{f.__name__}"
+    if total is None and hasattr(inputs, "__len__"):
+        total = len(inputs)
+    is_coroutine = inspect.iscoroutinefunction(f)
+    threads = None if is_coroutine else ThreadPoolExecutor(max_workers=max_concurrency)
+    loop = asyncio.get_running_loop()
+
+    async def call(item):
+        if is_coroutine:
+            return await f(item)
+        return await loop.run_in_executor(threads, f, item)
+
+    async def run(idx, item):
+        if limiter is None:
+            return idx, await call(item)
+        return idx, await limiter.acall(call, item)
+
+    def window() -> int:
+        if limiter is None:
+            return max_concurrency
+        return limiter.concurrency(max_concurrency)
 
-    pbar = tqdm(total=len(inputs), desc=desc, disable=not user_tqdm)
-    results = [None] * len(inputs)
-    for task in asyncio.as_completed(tasks):
-        idx, result = await task
+    pbar = tqdm(total=total, desc=desc, disable=not user_tqdm)
+    pending: set = set()
+    try:
+        async for idx, item in _aenumerate(inputs):
+            pending.add(asyncio.ensure_future(run(idx, item)))
+            while len(pending) >= window():
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    yield task.result()
+                    pbar.update(1)
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                yield task.result()
+                pbar.update(1)
+    finally:
+        for task in pending:
+            task.cancel()
+        pbar.close()
+        if threads is not None:
+            threads.shutdown(wait=False, cancel_futures=True)
+
+
+async def async_multi_thread(
+    f: Callable,
+    inputs: Any,
+    desc: str = "",
+    user_tqdm: bool = True,
+    max_concurrency: int = 32,
+    limiter: Optional[RateLimiter] = None,
+) -> List[Any]:
+    """
+    Run `f` over inputs from an event loop and return the results in input order.
+
+    Built on `async_multi_thread_imap`: `f` may be a coroutine function or a plain
+    one, inputs may be an async iterable, and `max_concurrency` bounds the number
+    of calls in flight. `limiter` adds rate limits and an adaptive window.
+
+    Usage:
+        inputs = list(range(10))
+        def function(i):
+            time.sleep(1)
+            return 1/i
+        results = await async_multi_thread(function, inputs)
+    """
+    results: List[Any] = []
+    async for idx, result in async_multi_thread_imap(
+        f, inputs, max_concurrency, desc, user_tqdm, limiter=limiter
+    ):
+        if idx >= len(results):
+            results.extend([None] * (idx + 1 - len(results)))
         results[idx] = result
-        pbar.update(1)
     return results
 
 
-__all__ = ["multi_thread", "multi_process", "async_multi_thread"]
+__all__ = [
+    "multi_thread",
+    "multi_process",
+    "multi_thread_imap",
+    "multi_process_imap",
+    "auto_chunksize",
+    "ItemError",
+    "multi_hybrid",
+    "ExecutorStats",
+    "WorkerPool",
+    "get_pool",
+    "close_pools",
+    "async_multi_thread",
+    "async_multi_thread_imap",
+    "cached_map",
+]
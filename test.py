@@ -1,9 +1,16 @@
+import os
+import pickle
+import tempfile
+import time
 import unittest
 from speedy_utils import (
     SPEED_CACHE_DIR, ICACHE, mkdir_or_exist, dump_jsonl, dump_json_or_pickle, timef,
     load_json_or_pickle, load_by_ext, identify, memoize, imemoize, imemoize_v2,
     flatten_list, fprint, get_arg_names, memoize_v2, is_interactive, print_table,
-    convert_to_builtin_python, Clock, multi_thread, multi_process, async_multi_thread
+    convert_to_builtin_python, Clock, multi_thread, multi_process, async_multi_thread,
+    LRUCache, SqliteStore, migrate_cache_dir, cached_map, cache_stats,
+    cache_stats_prometheus, memoize_method, multi_thread_imap, multi_process_imap,
+    share,
 )
 
 class TestSpeedyInit(unittest.TestCase):
@@ -77,5 +84,630 @@ class TestSpeedyInit(unittest.TestCase):
     def test_async_multi_thread(self):
         self.assertTrue(callable(async_multi_thread))
 
+    def test_async_multi_thread_concurrency(self):
+        import asyncio
+
+        in_flight = [0, 0]  # current, peak
+
+        async def call(x):
+            in_flight[0] += 1
+            in_flight[1] = max(in_flight)
+            await asyncio.sleep(0.001)
+            in_flight[0] -= 1
+            return x * 2
+
+        async def source():
+            for i in range(200):
+                yield i
+
+        results = asyncio.run(async_multi_thread(call, source(), user_tqdm=False, max_concurrency=8))
+        self.assertEqual(results, [x * 2 for x in range(200)])
+        self.assertEqual(in_flight[1], 8)
+        self.assertEqual(asyncio.run(async_multi_thread(abs, [-1, -2], user_tqdm=False)), [1, 2])
+
+
+class TestCache(unittest.TestCase):
+
+    def test_identify_structural(self):
+        import numpy as np
+
+        self.assertEqual(identify({"a": 1, "b": [2]}), identify({"b": [2], "a": 1}))
+        self.assertNotEqual(identify((1,)), identify([1]))
+        self.assertNotEqual(identify(1), identify(True))
+        arr = np.arange(12).reshape(3, 4)
+        self.assertEqual(identify(arr.T), identify(arr.T.copy()))
+        self.assertNotEqual(identify(arr), identify(arr.astype(np.int32)))
+        a = np.zeros(2, [("a", "<i8"), ("b", "<f8")])
+        self.assertNotEqual(identify(a), identify(np.zeros(2, [("x", "<f8"), ("y", "<i8")])))
+        self.assertEqual(identify(("f", (1,), {"a": 1, "b": 2})), identify(("f", (1,), {"b": 2, "a": 1})))
+        self.assertNotEqual(identify(("f", (1,))), identify(("f", (True,))))
+        self.assertNotEqual(identify(("f", (1,))), identify(("f", [1])))
+
+    def test_pkl5_roundtrip(self):
+        import numpy as np
+
+        obj = {"bytes": np.arange(7, dtype=np.int8), "arr": np.arange(1000.0), "name": "x"}
+        with tempfile.TemporaryDirectory() as tmp:
+            dump_json_or_pickle(obj, f"{tmp}/obj.pkl5")
+            for mmap_mode in (None, "r"):
+                loaded = load_json_or_pickle(f"{tmp}/obj.pkl5", mmap_mode=mmap_mode)
+                self.assertEqual(loaded["name"], "x")
+                self.assertTrue(np.array_equal(loaded["arr"], obj["arr"]))
+                self.assertEqual(loaded["arr"].ctypes.data % 64, 0)
+
+    def test_memoize_hit_skips_call(self):
+        calls = []
+
+        def square(x):
+            calls.append(x)
+            return x * x
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cached = memoize(square, cache_dir=cache_dir)
+            self.assertEqual(cached(3), 9)
+            self.assertEqual(cached(3), 9)
+            self.assertEqual(cached(4), 16)
+        self.assertEqual(calls, [3, 4])
+
+    def test_memoize_memory_tier(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cached = memoize(cache_dir=cache_dir, memory_max_entries=8)(lambda x: [x])
+            first = cached(1)
+            self.assertIs(cached(1), first)
+            self.assertEqual(cached.cache_info().hits, 1)
+
+    def test_memoize_single_flight(self):
+        calls = []
+
+        def slow(x):
+            calls.append(x)
+            time.sleep(0.1)
+            return x
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cached = memoize(slow, cache_dir=cache_dir)
+            results = multi_thread(lambda _: cached(1), range(4), workers=4, verbose=False)
+        self.assertEqual(results, [1, 1, 1, 1])
+        self.assertEqual(calls, [1])
+
+    def test_memoize_async(self):
+        import asyncio
+
+        calls = []
+
+        async def fetch(x):
+            calls.append(x)
+            await asyncio.sleep(0.05)
+            return x + 1
+
+        async def burst(fn):
+            return await asyncio.gather(*[fn(1) for _ in range(5)])
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cached = memoize(fetch, cache_dir=cache_dir)
+            self.assertEqual(asyncio.run(burst(cached)), [2] * 5)
+            self.assertEqual(asyncio.run(cached(1)), 2)
+        self.assertEqual(asyncio.run(burst(imemoize(fetch))), [2] * 5)
+        self.assertEqual(calls, [1, 1])
+
+    def test_multi_thread_imap_bounded(self):
+        pulled = []
+
+        def source():
+            for i in range(100):
+                pulled.append(i)
+                yield i
+
+        stream = multi_thread_imap(lambda x: x * 2, source(), workers=2, max_in_flight=4, verbose=False)
+        self.assertEqual(next(stream), 0)
+        self.assertLessEqual(len(pulled), 5)
+        self.assertEqual(list(stream), [x * 2 for x in range(1, 100)])
+
+        unordered = multi_thread_imap(lambda x: x + 1, iter(range(20)), ordered=False, verbose=False)
+        self.assertEqual(sorted(unordered), [(i, i + 1) for i in range(20)])
+
+    def test_multi_process_chunked(self):
+        from speedy_utils.multi_worker import auto_chunksize
+
+        self.assertEqual(auto_chunksize(1_000_000, 8, 1e-6), 31250)
+        self.assertEqual(auto_chunksize(1_000_000, 8, 1.0), 1)
+        inputs = list(range(-50, 50))
+        expected = [abs(x) for x in inputs]
+        self.assertEqual(multi_process(abs, inputs, workers=2, verbose=False), expected)
+        self.assertEqual(multi_process(abs, inputs, workers=2, verbose=False, chunksize=7), expected)
+
+    def test_multi_process_shared(self):
+        import numpy as np
+
+        table = np.arange(12.0).reshape(4, 3)
+        results = multi_process(lambda i, table: table[i].sum(), list(range(4)), workers=2, verbose=False, shared={"table": table})
+        self.assertEqual(results, [3.0, 12.0, 21.0, 30.0])
+        with share(table) as handle:
+            view = pickle.loads(pickle.dumps(handle)).view()
+            self.assertTrue(np.array_equal(view, table))
+            self.assertFalse(view.flags.owndata)
+
+        from speedy_utils.common import shared_array
+
+        handles = [share(np.full(4, i)) for i in range(shared_array._MAX_ATTACHED + 4)]
+        try:
+            kept = pickle.loads(pickle.dumps(handles[0])).view()[1:]
+            for handle in handles[1:]:
+                pickle.loads(pickle.dumps(handle)).view()
+            self.assertEqual(len(shared_array._ATTACHED), shared_array._MAX_ATTACHED)
+            self.assertTrue((kept == 0).all())  # detached from the cache, still mapped
+        finally:
+            for handle in handles:
+                handle.unlink()
+
+        handle = share(table)
+        own = handle.view()[2:]
+        handle.unlink()
+        self.assertEqual(own.sum(), 51.0)  # the creator's view outlives unlink()
+
+    def test_multi_worker_errors_and_checkpoint(self):
+        from speedy_utils.multi_worker import ItemError
+
+        attempts = []
+
+        def flaky(x):
+            attempts.append(x)
+            if x == 1 and attempts.count(1) < 3:
+                raise ConnectionError("retry me")
+            if x == 2:
+                raise ValueError("bad item")
+            return x
+
+        results = multi_thread(flaky, [0, 1, 2, 3], retries=2, retry_on=(ConnectionError,), backoff=0.001, on_error="return", verbose=False)
+        self.assertEqual(results[:2] + results[3:], [0, 1, 3])
+        self.assertIsInstance(results[2], ItemError)
+        self.assertEqual((results[2].index, type(results[2].exception)), (2, ValueError))
+        self.assertIsInstance(multi_process(int, ["1", "x", "3"], workers=2, verbose=False)[1], ItemError)
+        with self.assertRaises(ValueError):
+            multi_thread(flaky, [0, 2], on_error="skip", verbose=False)
+        with self.assertRaises(ValueError):
+            multi_process(int, ["1"], workers=1, on_error="skip", verbose=False)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            journal = f"{tmp}/journal.pkl"
+            attempts.clear()
+            multi_thread(flaky, [0, 2, 3], on_error="return", checkpoint=journal, verbose=False)
+            attempts.clear()
+            results = multi_thread(flaky, [0, 2, 3], on_error="return", checkpoint=journal, verbose=False)
+            self.assertEqual(attempts, [2])
+            self.assertEqual([results[0], results[2]], [0, 3])
+
+    def test_worker_pool_reuse(self):
+        from speedy_utils import WorkerPool
+
+        with WorkerPool(workers=2, maxtasksperchild=1) as pool:
+            self.assertEqual(pool.map(abs, [-1, -2, 3], verbose=False), [1, 2, 3])
+            self.assertEqual(pool.map(pow, [(2, 3), (3, 2)], verbose=False), [8, 9])
+            self.assertEqual(multi_process(len, ["ab", "c"], pool=pool, verbose=False), [2, 1])
+
+    def test_rate_limiter_against_mock_server(self):
+        import threading
+        import urllib.request
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        from speedy_utils import RateLimiter
+
+        active = [0]
+        lock = threading.Lock()
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):  # 429 above 3 concurrent requests
+                with lock:
+                    active[0] += 1
+                    throttled = active[0] > 3
+                try:
+                    if not throttled:
+                        time.sleep(0.01)
+                    self.send_response(429 if throttled else 200)
+                    self.end_headers()
+                finally:
+                    with lock:
+                        active[0] -= 1
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_port}/"
+        try:
+            limiter = RateLimiter(max_concurrency=12, cooldown=0.02, throttle_retries=30, throttle_backoff=0.005)
+            results = multi_thread(lambda _: urllib.request.urlopen(url).status, range(60), workers=12, limiter=limiter, verbose=False)
+            self.assertEqual(results, [200] * 60)
+            self.assertLess(limiter.window.size, 12)
+
+            start = time.perf_counter()
+            multi_thread(lambda _: None, range(30), workers=4, limiter=RateLimiter(rps=20), verbose=False)
+            self.assertGreater(time.perf_counter() - start, 0.4)  # burst of 20, then 20/s
+        finally:
+            server.shutdown()
+
+    def test_jsonl_streaming(self):
+        from speedy_utils import JsonlWriter, iter_jsonl
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = f"{tmp}/data.jsonl"
+            records = [{"id": i, "text": "ß" * (i % 7)} for i in range(2500)]
+            dump_jsonl((r for r in records[:1000]), path)
+            with JsonlWriter(path, batch_size=64) as writer:
+                writer.write_many(records[1000:])
+            self.assertEqual(list(iter_jsonl(path, block_size=100)), records)
+            self.assertEqual(load_json_or_pickle(path), records)
+            self.assertEqual(load_by_ext(path)[-1], records[-1])
+
+            dump_jsonl([{"x": float("nan"), "y": None}, {"z": float("inf")}], path)
+            self.assertIn("NaN", open(path).read())
+            loaded = list(iter_jsonl(path))
+            self.assertNotEqual(loaded[0]["x"], loaded[0]["x"])  # NaN survives the round trip
+            self.assertEqual((loaded[0]["y"], loaded[1]["z"]), (None, float("inf")))
+
+            dump_jsonl([{"a": 1}, {"a": 1, "b": None}], path)
+            first, second = open(path).read().splitlines()
+            self.assertTrue(second.startswith(first[:-1]))  # same writer for both lines
+
+    def test_load_sharded(self):
+        import pandas as pd
+        from speedy_utils import iter_sharded, load_sharded
+        from speedy_utils.common.utils_io import split_byte_ranges
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = f"{tmp}/data.jsonl"
+            records = [{"id": i, "text": "x" * (i % 11)} for i in range(3000)]
+            dump_jsonl(records, path)
+            ranges = split_byte_ranges(path, 7)
+            self.assertEqual((ranges[0][0], ranges[-1][1]), (0, os.path.getsize(path)))
+            self.assertEqual(load_sharded(path, workers=2, num_shards=7), records)
+            self.assertEqual(len(list(iter_sharded(path, workers=2, num_shards=3))), 3)
+            self.assertEqual(load_by_ext(path, sharded=True), records)
+
+            csv_path = f"{tmp}/data.csv"
+            frame = pd.DataFrame({"a": range(500), "b": [f"s{i}" for i in range(500)]})
+            frame.to_csv(csv_path, index=False)
+            self.assertTrue(load_sharded(csv_path, workers=2, num_shards=4).equals(frame))
+
+    def test_lazy_dataset(self):
+        import numpy as np
+
+        with tempfile.TemporaryDirectory() as tmp:
+            records = []
+            for shard in range(4):
+                chunk = [{"shard": shard, "i": i} for i in range(shard * 50)]
+                dump_jsonl(chunk, f"{tmp}/part{shard}.jsonl")
+                records += chunk
+            ds = load_by_ext(f"{tmp}/*.jsonl", lazy=True)
+            self.assertEqual(len(ds), len(records))
+            self.assertEqual(list(ds), records)
+            self.assertEqual(ds[-1], records[-1])
+            self.assertEqual(ds[10:200:9], records[10:200:9])
+            self.assertEqual(ds[[0, 120]], [records[0], records[120]])
+            self.assertEqual(ds[np.int64(3)], records[3])
+            self.assertEqual(ds[np.array([5, 6])], records[5:7])
+            self.assertEqual(pickle.loads(pickle.dumps(ds))[77], records[77])
+            with self.assertRaises(IndexError):
+                ds[len(records)]
+
+            with open(f"{tmp}/lines.txt", "w") as f:
+                f.write("a\n\nb\n")
+            self.assertEqual(list(load_by_ext(f"{tmp}/lines.txt", lazy=True)), ["a", "", "b"])
+            with open(f"{tmp}/blank.jsonl", "w") as f:
+                f.write('{"a": 1}\n  \n\n{"b": 2}\n')
+            self.assertEqual(list(load_by_ext(f"{tmp}/blank.jsonl", lazy=True)), [{"a": 1}, {"b": 2}])
+
+    def test_lazy_dataset_many_shards(self):
+        import resource
+        from unittest import mock
+
+        from speedy_utils.common import lazy_dataset
+
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        with tempfile.TemporaryDirectory() as tmp:
+            for shard in range(200):
+                dump_jsonl([{"shard": shard}], f"{tmp}/part{shard:03d}.jsonl")
+            in_use = len(os.listdir("/dev/fd"))
+            resource.setrlimit(resource.RLIMIT_NOFILE, (in_use + 32, hard))
+            try:
+                with mock.patch.object(lazy_dataset, "_MAX_OPEN", 8):
+                    ds = load_by_ext(f"{tmp}/*.jsonl", lazy=True)
+                    self.assertEqual(list(ds), [{"shard": shard} for shard in range(200)])
+                    self.assertEqual(ds[150], {"shard": 150})
+            finally:
+                resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+
+    def test_compressed_streams(self):
+        from speedy_utils import JsonlWriter, iter_jsonl
+
+        records = [{"id": i, "text": "abc" * (i % 5)} for i in range(500)]
+        with tempfile.TemporaryDirectory() as tmp:
+            for codec in (".gz", ".zst", ".lz4"):
+                path = f"{tmp}/data.jsonl{codec}"
+                dump_json_or_pickle(records, path)
+                self.assertEqual(load_by_ext(path), records)
+                with JsonlWriter(path, batch_size=7) as writer:  # appends a new frame
+                    writer.write_many(records[:20])
+                self.assertEqual(list(iter_jsonl(path)), records + records[:20])
+                dump_json_or_pickle({"codec": codec}, f"{tmp}/meta.json{codec}")
+                self.assertEqual(load_json_or_pickle(f"{tmp}/meta.json{codec}"), {"codec": codec})
+                dump_json_or_pickle(records, f"{tmp}/data.pkl{codec}")
+                self.assertEqual(load_by_ext(f"{tmp}/data.pkl{codec}"), records)
+
+    def test_load_cache_fingerprint(self):
+        from speedy_utils.common.load_cache import cached_load
+
+        calls = []
+
+        def parse(path):
+            calls.append(path)
+            return load_json_or_pickle(path)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = f"{tmp}/data.jsonl"
+            dump_jsonl([{"v": 1}], path)
+            for _ in range(2):
+                self.assertEqual(cached_load(path, parse, cache_dir=f"{tmp}/cache"), [{"v": 1}])
+            self.assertEqual(len(calls), 1)
+            dump_jsonl([{"v": 2}, {"v": 3}], path)
+            self.assertEqual(cached_load(path, parse, cache_dir=f"{tmp}/cache"), [{"v": 2}, {"v": 3}])
+            self.assertEqual(len(calls), 2)
+            self.assertEqual(cached_load(path, parse, hash_content=True, cache_dir=f"{tmp}/cache")[0], {"v": 2})
+            self.assertEqual(len(calls), 3)  # the content hash is part of the fingerprint
+
+    def test_multi_hybrid(self):
+        from speedy_utils import multi_hybrid
+
+        inputs = list(range(-40, 40))
+        self.assertEqual(multi_hybrid(abs, inputs, processes=2, threads=4, verbose=False, chunksize=7), [abs(x) for x in inputs])
+        self.assertEqual(multi_hybrid(pow, [(2, 5), (3, 2)], processes=2, threads=2, verbose=False), [32, 9])
+
+    def test_executor_stats(self):
+        from speedy_utils import ExecutorStats
+
+        stats = ExecutorStats(top_k=2)
+        multi_thread(lambda x: time.sleep(0.05 if x == 3 else 0), range(10), workers=2, stats=stats, verbose=False)
+        summary = stats.summary()
+        self.assertEqual(summary["items"], 10)
+        self.assertEqual(summary["slowest"][0][0], 3)
+        self.assertGreaterEqual(summary["latency"]["p99"], 0.05)
+        self.assertEqual(sum(row["items"] for row in summary["workers"].values()), 10)
+        stats = ExecutorStats()
+        self.assertEqual(multi_process(abs, [-1, -2], workers=2, stats=stats, verbose=False), [1, 2])
+        self.assertIn("p95", stats.report())
+
+    def test_multi_process_imap(self):
+        self.assertEqual(list(multi_process_imap(abs, iter(range(-5, 0)), workers=2, verbose=False)), [5, 4, 3, 2, 1])
+
+    def test_cached_map(self):
+        calls = []
+
+        def square(x):
+            calls.append(x)
+            return x * x
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cached = memoize(square, cache_dir=cache_dir, backend="sqlite")
+            cached(2)
+            results, counts = cached_map(cached, [1, 2, 3, 1], verbose=False)
+            self.assertEqual(results, [1, 4, 9, 1])
+            self.assertEqual(counts, {"hits": 1, "misses": 3})
+            self.assertEqual(cached_map(cached, [3], verbose=False)[1]["hits"], 1)
+        self.assertEqual(sorted(calls), [1, 2, 3])
+
+        from unittest import mock
+
+        with mock.patch.dict(os.environ, {"AV_MEMOIZE_DISABLE": "1"}):
+            disabled = memoize(square)
+        self.assertEqual(cached_map(disabled, [1, 2, 1], verbose=False), ([1, 4, 1], {"hits": 0, "misses": 3}))
+
+    def test_cache_stats(self):
+        def stats_probe(x):
+            return x
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cached = memoize(stats_probe, cache_dir=cache_dir)
+            cached(1)
+            cached(1)
+            (row,) = cache_stats("stats_probe", count_entries=True)
+        self.assertEqual((row["hits"], row["misses"], row["entries"]), (1, 1, 1))
+        self.assertIn("speedy_cache_hits_total", cache_stats_prometheus())
+
+    def test_cache_stats_per_decoration(self):
+        def redecorated(x):
+            return x
+
+        with tempfile.TemporaryDirectory() as d1, tempfile.TemporaryDirectory() as d2:
+            first = memoize(redecorated, cache_dir=d1)
+            second = memoize(redecorated, cache_dir=d2)
+            first(1)
+            second(1)
+            second(2)
+            self.assertEqual(second.cache_stats.store.root, d2)
+            self.assertEqual(second.cache_stats.as_dict(count_entries=True)["entries"], 2)
+            (row,) = cache_stats("redecorated", count_entries=True)
+        self.assertEqual((row["misses"], row["entries"]), (3, 3))
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            on_disk, in_memory = [lambda x: x, lambda x: x]  # same qualname
+            memoize(on_disk, cache_dir=cache_dir)(1)
+            self.assertEqual(imemoize(in_memory).cache_stats.kind, "imemoize")
+
+    def test_memoize_v2_stats_entries(self):
+        def load_(x):
+            return x
+
+        def load_data(x):
+            return x
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            short = memoize_v2(keys=["x"], cache_dir=cache_dir)(load_)
+            longer = memoize_v2(keys=["x"], cache_dir=cache_dir)(load_data)
+            short(1)
+            longer(1)
+            longer(2)
+            rows = cache_stats("load_", count_entries=True)
+        entries = {
+            row["function"].rsplit(".", 1)[-1]: row["entries"]
+            for row in rows
+            if "test_memoize_v2_stats_entries" in row["function"]
+        }
+        self.assertEqual((entries["load_"], entries["load_data"]), (1, 2))
+
+    def test_memoize_method_per_instance(self):
+        import gc
+        import weakref
+
+        class Result(list):
+            pass
+
+        class Model:
+            def __init__(self, scale):
+                self.scale = scale
+                self.calls = 0
+
+            @memoize_method(max_entries=2)
+            def predict(self, x):
+                self.calls += 1
+                return Result([x * self.scale])
+
+        a, b = Model(1), Model(10)
+        self.assertEqual((a.predict(3), b.predict(3)), ([3], [30]))
+        a.predict(3)
+        self.assertEqual(a.calls, 1)
+        a.predict(4)
+        a.predict(5)
+        a.predict(3)  # evicted by the two newer entries
+        self.assertEqual(a.calls, 4)
+        result = weakref.ref(b.predict(3))
+        del b
+        gc.collect()
+        self.assertIsNone(result())
+        c = Model(1)
+        self.assertEqual([type(c.predict(x)[0]) for x in (1, True, 1.0)], [int, int, float])
+        self.assertEqual(c.calls, 3)  # 1, True and 1.0 are cached separately
+
+        class Slotted:
+            __slots__ = ("calls",)
+
+            def __init__(self):
+                self.calls = 0
+
+            @memoize_method
+            def double(self, x):
+                self.calls += 1
+                return 2 * x
+
+        slotted = Slotted()
+        self.assertEqual([slotted.double(2), slotted.double(2)], [4, 4])
+        self.assertEqual(slotted.calls, 2)  # no __dict__ or __weakref__: not cached
+
+    def test_memoize_sqlite_backend(self):
+        calls = []
+
+        def square(x):
+            calls.append(x)
+            return x * x
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cached = memoize(square, cache_dir=cache_dir, backend="sqlite")
+            self.assertEqual([cached(2), cached(2)], [4, 4])
+        self.assertEqual(calls, [2])
+
+    def test_memoize_unstorable_result(self):
+        calls = []
+
+        def listed(x):
+            calls.append(x)
+            return [x]
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cached = memoize(listed, cache_dir=cache_dir, cache_type=".npy")
+            self.assertEqual([cached(1), cached(1)], [[1], [1]])
+        self.assertEqual(calls, [1, 1])  # computed once per call, never twice
+
+    def test_memoize_custom_store(self):
+        from speedy_utils.common.cache_store import CacheStore
+        from speedy_utils.common.lru_cache import _MISSING
+
+        class DictStore(CacheStore):
+            def __init__(self):
+                self.data = {}
+
+            def get(self, key, default=_MISSING):
+                return self.data.get(key, default)
+
+            def put(self, key, value):
+                self.data[key] = value
+
+            def delete(self, key):
+                self.data.pop(key, None)
+
+        calls = []
+
+        def double(x):
+            calls.append(x)
+            return 2 * x
+
+        cached = memoize(double, backend=DictStore())
+        self.assertEqual([cached(2), cached(2)], [4, 4])
+        self.assertEqual(calls, [2])
+
+    def test_migrate_cache_dir(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            from speedy_utils.common.load_cache import cached_load
+
+            dump_json_or_pickle({"a": 1}, f"{cache_dir}/funcs/f/abc.pkl")
+            dump_json_or_pickle([3], f"{cache_dir}/funcs/g/def.pkl.gz")
+            dump_jsonl([{"b": 2}], f"{cache_dir}/data.jsonl")
+            cached_load(f"{cache_dir}/data.jsonl", load_json_or_pickle, cache_dir=f"{cache_dir}/loads")
+            os.remove(f"{cache_dir}/data.jsonl")
+            store = SqliteStore(f"{cache_dir}/cache.sqlite")
+            self.assertEqual(migrate_cache_dir(cache_dir, store, remove=True), 2)
+            self.assertEqual(store.get_many(["funcs/f/abc", "funcs/g/def"]), {"funcs/f/abc": {"a": 1}, "funcs/g/def": [3]})
+            self.assertEqual(len(os.listdir(f"{cache_dir}/loads")), 2)  # load cache untouched
+
+    def test_imemoize_v2_keys(self):
+        calls = []
+
+        @imemoize_v2(keys=["a"])
+        def pick(a, b):
+            calls.append((a, b))
+            return a
+
+        self.assertEqual(pick(1, 2), 1)
+        self.assertEqual(pick(1, b=3), 1)
+        self.assertEqual(calls, [(1, 2)])
+
+    def test_lru_cache_evicts_least_recent(self):
+        cache = LRUCache(max_entries=2)
+        cache["a"] = 1
+        cache["b"] = 2
+        cache.get("a")
+        cache["c"] = 3
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        info = cache.cache_info()
+        self.assertEqual((info.currsize, info.evictions), (2, 1))
+
+    def test_lru_cache_max_bytes_fits_large_values(self):
+        cache = LRUCache(max_bytes=1_000_000)
+        cache["big"] = bytes(200_000)
+        self.assertIn("big", cache)
+        cache["bigger"] = bytes(900_000)
+        self.assertNotIn("big", cache)
+        self.assertEqual(cache.cache_info().currsize, 1)
+
+    def test_imemoize_with_limits(self):
+        @imemoize(max_entries=1)
+        def double(x):
+            return 2 * x
+
+        double(1)
+        double(1)
+        double(2)
+        info = double.cache_info()
+        self.assertEqual((info.hits, info.misses, info.currsize), (1, 2, 1))
+
 if __name__ == '__main__':
     unittest.main()